@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# benchmarks/bench_chart.py
+"""
+Benchmark for chart rendering as the plotted window grows.
+Renders the same synthetic long-format history with every point drawn
+(max_points=None, the old behaviour) and with LTTB downsampling, at full
+resolution and in preview mode. The chart cache is bypassed so every run draws.
+
+Usage:
+    python benchmarks/bench_chart.py                         # 48 .. 20,000 snapshots
+    python benchmarks/bench_chart.py --windows 1000 5000 --wallets 4
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_chart_")
+os.environ["CHART_CACHE_DIR"] = os.path.join(WORKDIR, "cache")
+
+from bot.visualizer import plot_wallet_trends
+
+
+def write_history(path: str, snapshots: int, wallets: int, seed: int = 42):
+    """Random-walk balances, one long-format row per wallet per 5-minute snapshot."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=7)))
+    balances = [rng.uniform(1000, 100000) for _ in range(wallets)]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "wallet", "address", "balance"])
+        for i in range(snapshots):
+            timestamp = (start + timedelta(minutes=5 * i)).isoformat()
+            for w in range(wallets):
+                balances[w] = max(0.0, balances[w] + rng.gauss(0, 500))
+                writer.writerow([timestamp, f"BENCH W{w:02d}", f"T{w:033d}", f"{balances[w]:.6f}"])
+
+
+def time_render(path: str, runs: int, **options) -> float:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        plot_wallet_trends(path, output_path=os.path.join(WORKDIR, "out.png"), use_cache=False, **options)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chart render time against window length")
+    parser.add_argument("--windows", type=int, nargs="+", default=[48, 1_000, 5_000, 20_000],
+                        help="snapshots per chart")
+    parser.add_argument("--wallets", type=int, default=6, help="wallets (subplots) per chart")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per mode")
+    args = parser.parse_args()
+
+    modes = [
+        ("all points", {"max_points": None}),
+        ("lttb", {}),
+        ("lttb preview", {"preview": True}),
+    ]
+    results = []
+    for window in args.windows:
+        path = os.path.join(WORKDIR, f"history_{window}.csv")
+        write_history(path, window, args.wallets)
+        timings = [time_render(path, args.runs, num_records=window, **options) for _, options in modes]
+        results.append((window, timings))
+        print(f"  {window:>7,} snapshots done")
+
+    print()
+    header = f"{'snapshots':>10}" + "".join(f"{name + ' s':>16}" for name, _ in modes)
+    print(header)
+    print("-" * len(header))
+    for window, timings in results:
+        print(f"{window:>10,}" + "".join(f"{seconds:>16.3f}" for seconds in timings))
+    print(f"\n{args.wallets} wallets, median of {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
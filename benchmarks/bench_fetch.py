@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# benchmarks/bench_fetch.py
+"""
+Benchmark for the balance fetch path against the local Tronscan stand-in.
+Drives fetch_all_usdt_balances() and handle_check_command("") at several
+wallet counts and reports p50/p95/p99 latency and throughput per scenario.
+
+Usage:
+    python benchmarks/bench_fetch.py                      # 10, 100, 1000 wallets
+    python benchmarks/bench_fetch.py --sizes 10 100 --runs 10 --latency 120 --throttle-rate 0.02
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.mock_tronscan import add_mock_arguments, settings_from_args, start_mock_server
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def make_address(rng: random.Random) -> str:
+    """Random but valid Tron address: base58check of 0x41 + 20 bytes (providers reject bad checksums)."""
+    payload = b"\x41" + rng.randbytes(20)
+    raw = payload + hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    num = int.from_bytes(raw, "big")
+    chars = []
+    while num:
+        num, rem = divmod(num, 58)
+        chars.append(BASE58_ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+def make_wallets(count: int, seed: int = 42) -> dict:
+    """Generate `count` wallets with valid TRC20 addresses."""
+    rng = random.Random(seed)
+    wallets = {}
+    for i in range(count):
+        address = make_address(rng)
+        name = f"BENCH W{i:04d}"
+        wallets[name] = {"company": "BENCH", "wallet": name, "address": address}
+    return wallets
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_scenario(label: str, fn, wallet_count: int, runs: int, warm: bool) -> dict:
+    from bot.usdt_checker import get_balance_cache
+
+    durations = []
+    for _ in range(runs):
+        if not warm:
+            get_balance_cache().clear()
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    total_time = sum(durations)
+    return {
+        "label": label,
+        "wallets": wallet_count,
+        "runs": runs,
+        "p50": percentile(durations, 50),
+        "p95": percentile(durations, 95),
+        "p99": percentile(durations, 99),
+        "mean": statistics.mean(durations),
+        "throughput": wallet_count * runs / total_time if total_time else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the balance fetch path against a local mock")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="wallet counts to test")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per scenario")
+    parser.add_argument("--warm", action="store_true", help="keep the balance cache between runs")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="cap the adaptive rate limiter at this many requests/s (default: effectively unlimited)")
+    parser.add_argument("--url", default=None, help="use an already running mock instead of starting one")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    settings = settings_from_args(args)
+    if args.url:
+        base_url = args.url
+    else:
+        server = start_mock_server(settings)
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+    workdir = tempfile.mkdtemp(prefix="bench_fetch_")
+    wallets_file = os.path.join(workdir, "wallets.json")
+    os.environ["WALLETS_FILE"] = wallets_file
+    os.environ["CSV_FILE"] = os.path.join(workdir, "wallet_balances.csv")
+
+    # Import after WALLETS_FILE is set so the bot reads the generated wallet list
+    import bot.usdt_checker as usdt_checker
+    from bot.balance_providers import ProviderChain, TronscanProvider
+    from bot.slack_commands import handle_check_command
+
+    provider = TronscanProvider(base_url=base_url)
+    rate = args.rate if args.rate is not None else 1_000_000.0
+    provider.limiter.rate = provider.limiter.max_rate = rate
+    provider.limiter.log_interval = float("inf")
+    usdt_checker.set_provider_chain(ProviderChain([provider]))
+
+    print(f"🧪 Mock at {base_url}: latency {args.latency:g}±{args.jitter:g}ms, "
+          f"errors {args.error_rate:.0%}, 429s {args.throttle_rate:.0%}, {args.extra_tokens} extra tokens")
+    print(f"   {args.runs} runs per scenario, cache {'warm' if args.warm else 'cold'}\n")
+
+    results = []
+    for size in args.sizes:
+        with open(wallets_file, "w") as f:
+            json.dump(make_wallets(size), f)
+        results.append(run_scenario("fetch_all_usdt_balances", usdt_checker.fetch_all_usdt_balances,
+                                    size, args.runs, args.warm))
+        results.append(run_scenario("handle_check_command", lambda: handle_check_command(""),
+                                    size, args.runs, args.warm))
+
+    print()
+    header = f"{'scenario':<26}{'wallets':>8}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}{'wallets/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['label']:<26}{r['wallets']:>8}{r['p50']:>10.3f}{r['p95']:>10.3f}{r['p99']:>10.3f}"
+              f"{r['throughput']:>12.1f}")
+
+    print(f"\nUpstream requests served by mock: {settings.requests if not args.url else 'n/a'}")
+    print(f"Provider latency: {provider.latency.summary()}")
+    served = provider.latency.successes + provider.latency.failures
+    if served == 0 or (not args.url and settings.requests == 0):
+        sys.exit("❌ No upstream requests were made - the numbers above measure no work")
+
+
+if __name__ == "__main__":
+    main()
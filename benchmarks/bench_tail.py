@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# benchmarks/bench_tail.py
+"""
+Benchmark for loading chart data from the history CSV.
+Compares the full-file path (pd.read_csv + drop_duplicates + sort_values + tail)
+with the tail-seek reader used by the visualizer, for the long balance log and
+the legacy wide CSV at several file sizes.
+
+Usage:
+    python benchmarks/bench_tail.py                          # 10k, 100k, 1M rows
+    python benchmarks/bench_tail.py --sizes 10000 --records 200 --format long
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd
+
+from bot.visualizer import _read_csv_frame, _long_to_wide
+
+
+def write_history(path: str, rows: int, wallets: int, layout: str, seed: int = 42):
+    """Write `rows` data rows (long: one per wallet per snapshot, wide: one per snapshot)."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=7)))
+    names = [f"BENCH W{i:02d}" for i in range(wallets)]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if layout == "long":
+            writer.writerow(["timestamp", "wallet", "address", "balance"])
+            for i in range(rows):
+                timestamp = (start + timedelta(minutes=5 * (i // wallets))).isoformat()
+                name = names[i % wallets]
+                writer.writerow([timestamp, name, f"T{i % wallets:033d}", f"{rng.uniform(0, 100000):.6f}"])
+        else:
+            writer.writerow(["Timestamp"] + names)
+            for i in range(rows):
+                timestamp = (start + timedelta(minutes=5 * i)).isoformat()
+                writer.writerow([timestamp] + [f"{rng.uniform(0, 100000):.6f}" for _ in names])
+
+
+def full_read(path: str, layout: str, records: int) -> pd.DataFrame:
+    """The visualizer's original approach: parse everything, then keep the tail."""
+    df = pd.read_csv(path)
+    if layout == "long":
+        df = _long_to_wide(df.rename(columns={"timestamp": "Timestamp", "wallet": "Wallet", "balance": "Balance"}))
+    return _finish(df, records)
+
+
+def tail_read(path: str, layout: str, records: int) -> pd.DataFrame:
+    return _finish(_read_csv_frame(path, records), records)
+
+
+def _finish(df: pd.DataFrame, records: int) -> pd.DataFrame:
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"].astype(str).str.split('+').str[0])
+    return df.drop_duplicates(subset=['Timestamp']).sort_values("Timestamp").tail(records)
+
+
+def time_it(fn, runs: int) -> tuple[float, float, pd.DataFrame]:
+    durations = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), min(durations), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-file vs tail-seek history reads")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="data rows per file")
+    parser.add_argument("--wallets", type=int, default=10, help="wallets per snapshot")
+    parser.add_argument("--records", type=int, default=48, help="snapshots to keep (NUM_RECORDS_TO_PLOT)")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per reader")
+    parser.add_argument("--format", choices=["long", "wide", "both"], default="both")
+    args = parser.parse_args()
+
+    layouts = ["long", "wide"] if args.format == "both" else [args.format]
+    workdir = tempfile.mkdtemp(prefix="bench_tail_")
+
+    results = []
+    for layout in layouts:
+        for size in args.sizes:
+            path = os.path.join(workdir, f"{layout}_{size}.csv")
+            write_history(path, size, args.wallets, layout)
+            mb = os.path.getsize(path) / 1_000_000
+
+            full_median, _, full_df = time_it(lambda: full_read(path, layout, args.records), args.runs)
+            tail_median, _, tail_df = time_it(lambda: tail_read(path, layout, args.records), args.runs)
+            same = full_df.reset_index(drop=True).equals(tail_df.reset_index(drop=True))
+            results.append((layout, size, mb, full_median, tail_median, same))
+            print(f"  {layout:<5} {size:>9,} rows done")
+            os.remove(path)
+
+    print()
+    header = f"{'layout':<8}{'rows':>11}{'MB':>8}{'full s':>10}{'tail s':>10}{'speedup':>10}{'same':>6}"
+    print(header)
+    print("-" * len(header))
+    for layout, size, mb, full_s, tail_s, same in results:
+        print(f"{layout:<8}{size:>11,}{mb:>8.1f}{full_s:>10.4f}{tail_s:>10.4f}{full_s / tail_s:>9.1f}x"
+              f"{'yes' if same else 'NO':>6}")
+    print(f"\nLast {args.records} snapshots, {args.wallets} wallets, median of {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# benchmarks/mock_tronscan.py
+"""
+Local stand-in for the Tronscan `/api/account/tokens` endpoint.
+Simulates latency, random errors, 429 throttling and large payloads so the
+balance fetch path can be measured without touching the live API.
+
+Run standalone:
+    python benchmarks/mock_tronscan.py --port 8099 --latency 80 --throttle-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+USDT_CONTRACT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+
+
+class MockSettings:
+    """Behaviour knobs shared by all request handlers."""
+
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 20, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1, extra_tokens: int = 5):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.extra_tokens = extra_tokens
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def mock_balance_sun(address: str) -> int:
+    """Deterministic fake balance (in sun) so repeated runs are comparable."""
+    return int(hashlib.sha256(address.encode()).hexdigest()[:10], 16) % 10_000_000_000
+
+
+def make_handler(settings: MockSettings):
+    class TronscanHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def do_GET(self):
+            with settings.lock:
+                settings.requests += 1
+
+            parsed = urlparse(self.path)
+            if parsed.path != "/api/account/tokens":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            delay = max(0.0, random.gauss(settings.latency_ms, settings.jitter_ms)) / 1000
+            time.sleep(delay)
+
+            roll = random.random()
+            if roll < settings.throttle_rate:
+                self._send_json(429, {"error": "rate limited"}, {"Retry-After": str(settings.retry_after)})
+                return
+            if roll < settings.throttle_rate + settings.error_rate:
+                self._send_json(random.choice([500, 502, 503]), {"error": "upstream error"})
+                return
+
+            address = parse_qs(parsed.query).get("address", [""])[0]
+            tokens = [{"tokenId": "_", "balance": "1000000", "tokenName": "trx", "tokenDecimal": 6}]
+            tokens += [{"tokenId": f"TFAKE{i:029d}", "balance": str(i), "tokenName": f"fake{i}", "tokenDecimal": 6}
+                       for i in range(settings.extra_tokens)]
+            tokens.append({"tokenId": USDT_CONTRACT, "balance": str(mock_balance_sun(address)),
+                           "tokenName": "Tether USD", "tokenDecimal": 6})
+            self._send_json(200, {"total": len(tokens), "data": tokens})
+
+        def _send_json(self, status: int, body: dict, headers: dict | None = None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return TronscanHandler
+
+
+def start_mock_server(settings: MockSettings, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the mock server in a background thread and return it (see `server_port`)."""
+    server = ThreadingHTTPServer((host, port), make_handler(settings))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-tronscan", daemon=True).start()
+    return server
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """Register the mock behaviour flags on a parser (shared with the benchmark runner)."""
+    parser.add_argument("--latency", type=float, default=50, help="mean response latency in ms")
+    parser.add_argument("--jitter", type=float, default=20, help="latency standard deviation in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 5xx responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--extra-tokens", type=int, default=5, help="extra token entries per payload")
+
+
+def settings_from_args(args: argparse.Namespace) -> MockSettings:
+    return MockSettings(
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        extra_tokens=args.extra_tokens,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Tronscan /api/account/tokens stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_mock_server(settings_from_args(args), args.host, args.port)
+    print(f"🧪 Mock Tronscan listening on http://{args.host}:{server.server_port}")
+    print(f"   Use TRONSCAN_API_URL=http://{args.host}:{server.server_port} to point the bot at it")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Mock server stopped")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
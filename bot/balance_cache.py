@@ -0,0 +1,170 @@
+# bot/balance_cache.py
+"""
+In-process TTL cache for wallet balances.
+Serves fresh values directly, serves stale values while a background refresh
+runs (stale-while-revalidate), falls back to the last known value when the
+upstream is failing, and tracks hit/miss/eviction counters.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Callable, NamedTuple
+
+
+class BalanceReading(NamedTuple):
+    """A balance together with how old it is (None when it could not be fetched)."""
+    balance: Decimal | None
+    age: float | None
+    degraded: bool = False  # True when a live fetch failed and this is the last known value
+
+
+class BalanceCache:
+    """
+    Address-keyed balance cache with TTL, stale-while-revalidate and LRU eviction.
+
+    Entries younger than `ttl` are served as-is. Entries between `ttl` and
+    `stale_ttl` are served immediately while a background refresh is scheduled.
+    Older entries are treated as misses and fetched synchronously; if that
+    fetch fails, the last known value is returned marked as degraded.
+    """
+
+    def __init__(self, fetcher: Callable[[str], Decimal | None], ttl: float, stale_ttl: float,
+                 max_entries: int, refresh_workers: int = 2):
+        self._fetcher = fetcher
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[str, tuple[Decimal, float]] = OrderedDict()
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers,
+                                                    thread_name_prefix="balance-refresh")
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_failures = 0
+        self.fallbacks = 0
+
+    def get(self, address: str) -> BalanceReading:
+        """
+        Get the balance for an address, fetching it if needed.
+
+        Args:
+            address: Tron wallet address
+
+        Returns:
+            BalanceReading: Balance and its age in seconds
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is not None:
+                balance, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(address)
+                    return BalanceReading(balance, age)
+                if age < self.stale_ttl:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(address)
+                    self._schedule_refresh(address)
+                    return BalanceReading(balance, age)
+            self.misses += 1
+
+        balance = self._fetcher(address)
+        if balance is not None:
+            self.put(address, balance)
+            return BalanceReading(balance, 0.0)
+
+        # Upstream failed - fall back to the last known value, however old
+        last_known = self.peek(address)
+        if last_known is None:
+            return BalanceReading(None, None)
+        with self._lock:
+            self.fallbacks += 1
+        return BalanceReading(last_known.balance, last_known.age, degraded=True)
+
+    def put(self, address: str, balance: Decimal, fetched_at: float | None = None):
+        """Store a freshly fetched balance, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[address] = (balance, fetched_at if fetched_at is not None else time.time())
+            self._entries.move_to_end(address)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def peek(self, address: str) -> BalanceReading | None:
+        """Return the cached reading regardless of age, without fetching or counting."""
+        with self._lock:
+            entry = self._entries.get(address)
+        if entry is None:
+            return None
+        balance, fetched_at = entry
+        return BalanceReading(balance, time.time() - fetched_at)
+
+    def invalidate(self, address: str):
+        """Drop a single address from the cache."""
+        with self._lock:
+            self._entries.pop(address, None)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return counters and current size for logging."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "refreshing": len(self._refreshing),
+                "refresh_failures": self.refresh_failures,
+                "fallbacks": self.fallbacks,
+            }
+
+    def _schedule_refresh(self, address: str):
+        """Queue a background refresh for an address. Caller must hold the lock."""
+        if address in self._refreshing:
+            return
+        self._refreshing.add(address)
+        self._refresh_executor.submit(self._refresh, address)
+
+    def _refresh(self, address: str):
+        """Background refresh worker - keeps the stale value if the fetch fails."""
+        try:
+            balance = self._fetcher(address)
+            if balance is not None:
+                self.put(address, balance)
+            else:
+                with self._lock:
+                    self.refresh_failures += 1
+        except Exception as e:
+            print(f"Error refreshing cached balance for {address}: {e}")
+            with self._lock:
+                self.refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(address)
+
+
+def format_age(age: float | None) -> str:
+    """Format a reading age for display, e.g. 'just now', '45s ago', '3m ago'."""
+    if age is None:
+        return "unknown age"
+    if age < 5:
+        return "just now"
+    if age < 60:
+        return f"{int(age)}s ago"
+    if age < 3600:
+        return f"{int(age // 60)}m ago"
+    return f"{int(age // 3600)}h ago"
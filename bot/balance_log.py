@@ -0,0 +1,250 @@
+# bot/balance_log.py
+"""
+Long-format balance history log: one `timestamp,wallet,address,balance` row
+per wallet per snapshot, so adding or removing wallets never misaligns
+columns. The file stays open and rows are buffered in memory, then written
+as one group commit (write + fsync) when the buffer fills, on a timer, or at
+shutdown.
+
+Convert an existing wide Timestamp,<wallet>,... CSV (while the listener is stopped):
+    python -m bot.balance_log convert [wide.csv] [long.csv]
+"""
+import atexit
+import csv
+import os
+import sys
+import threading
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot.config import CSV_FILE, BALANCE_LOG_FILE, BALANCE_LOG_FLUSH_INTERVAL, BALANCE_LOG_MAX_BUFFER
+
+HEADER = ["timestamp", "wallet", "address", "balance"]
+
+
+class BalanceLog:
+    """
+    Append-only long-format CSV with buffered group commits.
+
+    `append()` only touches memory; a background thread flushes every
+    `flush_interval` seconds, and a full buffer flushes immediately.
+    """
+
+    def __init__(self, path: str = BALANCE_LOG_FILE, flush_interval: float = BALANCE_LOG_FLUSH_INTERVAL,
+                 max_buffer: int = BALANCE_LOG_MAX_BUFFER):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.rows_written = 0
+        self.commits = 0
+        self._buffer: List[list] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._stop_event = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="balance-log-flush", daemon=True)
+        self._flusher.start()
+
+    def append(self, timestamp: str, rows: Iterable[Tuple[str, str, Decimal]]) -> int:
+        """
+        Buffer one snapshot.
+
+        Args:
+            timestamp: ISO timestamp shared by all rows of the snapshot
+            rows: (wallet, address, balance) tuples
+
+        Returns:
+            int: Number of rows buffered
+        """
+        with self._lock:
+            before = len(self._buffer)
+            self._buffer.extend([timestamp, wallet, address, balance] for wallet, address, balance in rows)
+            added = len(self._buffer) - before
+            if len(self._buffer) >= self.max_buffer:
+                self._flush_locked()
+        return added
+
+    def flush(self):
+        """Write and fsync everything buffered so far."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Stop the flush timer, commit pending rows and close the file."""
+        self._stop_event.set()
+        with self._lock:
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+
+    def rotate(self, dest: str) -> bool:
+        """
+        Commit pending rows and move the current file to `dest`; the next
+        commit starts a fresh file with a header.
+
+        Returns:
+            bool: True if there was a file to move
+        """
+        with self._lock:
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+            if not os.path.exists(self.path):
+                return False
+            os.replace(self.path, dest)
+            return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Error flushing balance log '{self.path}': {e}")
+
+    def _open(self):
+        """Open the log once and write the header if the file is new. Caller must hold the lock."""
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(HEADER)
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        self._writer.writerows(self._buffer)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.rows_written += len(self._buffer)
+        self.commits += 1
+        self._buffer.clear()
+
+
+_logs: Dict[str, BalanceLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_balance_log(path: str = BALANCE_LOG_FILE) -> BalanceLog:
+    """Return the process-wide log for `path`, opening it on first use."""
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = BalanceLog(path)
+        return log
+
+
+def flush_balance_logs():
+    """Commit buffered rows of every open log, e.g. before reading the history back."""
+    with _logs_lock:
+        logs = list(_logs.values())
+    for log in logs:
+        log.flush()
+
+
+def close_balance_logs():
+    """Commit and close every open balance log (called on shutdown)."""
+    with _logs_lock:
+        logs = list(_logs.values())
+        _logs.clear()
+    for log in logs:
+        try:
+            log.close()
+        except Exception as e:
+            print(f"❌ Error closing balance log '{log.path}': {e}")
+
+
+atexit.register(close_balance_logs)
+
+
+def is_long_format(header: Optional[List[str]]) -> bool:
+    """True for a `timestamp,wallet,address,balance` header."""
+    return bool(header) and [column.strip().lower() for column in header[:2]] == ["timestamp", "wallet"]
+
+
+def read_history_rows(csv_path: str) -> Iterable[Tuple[str, str, str]]:
+    """
+    Yield (timestamp, wallet, balance) from either the long log or a wide
+    Timestamp,<wallet>,... CSV. Empty wide cells are skipped.
+    """
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        if is_long_format(header):
+            for row in reader:
+                if len(row) >= 4:
+                    yield row[0], row[1], row[3]
+            return
+        wallet_names = header[1:]
+        for row in reader:
+            if not row:
+                continue
+            for wallet, balance in zip(wallet_names, row[1:]):
+                if balance != "":
+                    yield row[0], wallet, balance
+
+
+def convert_wide_csv(wide_path: str = CSV_FILE, long_path: str = BALANCE_LOG_FILE,
+                     addresses: Optional[Dict[str, str]] = None) -> int:
+    """
+    Merge the contents of a wide CSV into the long-format log.
+    The converted (older) rows are placed before any rows the log already
+    holds, keeping the file in time order for tail reads.
+
+    Args:
+        wide_path: Existing Timestamp,<wallet>,... file
+        long_path: Long-format log to merge into (rewritten atomically)
+        addresses: Wallet name to address; defaults to the current wallet list.
+            Wallets that no longer exist get an empty address.
+
+    Returns:
+        int: Number of rows written
+    """
+    if addresses is None:
+        from bot.wallet_registry import get_wallet_registry
+        addresses = get_wallet_registry().addresses()
+
+    tmp_path = f"{long_path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        writer.writerow(HEADER)
+        written = 0
+        for timestamp, wallet, balance in read_history_rows(wide_path):
+            writer.writerow([timestamp, wallet, addresses.get(wallet, ""), balance])
+            written += 1
+        if os.path.exists(long_path):
+            with open(long_path, newline='', encoding='utf-8') as existing:
+                existing.readline()  # header
+                for line in existing:
+                    out.write(line)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, long_path)
+    return written
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "convert":
+        print("Usage: python -m bot.balance_log convert [wide.csv] [long.csv]")
+        return
+    wide_path = sys.argv[2] if len(sys.argv) > 2 else CSV_FILE
+    long_path = sys.argv[3] if len(sys.argv) > 3 else BALANCE_LOG_FILE
+    if not os.path.exists(wide_path):
+        print(f"❌ CSV data file '{wide_path}' not found")
+        return
+    rows = convert_wide_csv(wide_path, long_path)
+    print(f"✅ Converted {rows} rows from {wide_path} into {long_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# bot/balance_poller.py
+"""
+Background balance poller for the long-running Slack listener.
+Refreshes every configured wallet on a fixed interval, spreading the requests
+evenly across it, and keeps the latest snapshot in the shared balance cache
+so !check can answer from memory. With transfer tracking enabled, each refresh
+applies new Transfer events instead of re-reading the full balance. Completed
+cycles are appended to the balance history when POLL_LOG_HISTORY is set.
+"""
+import threading
+import time
+
+from bot.config import POLL_INTERVAL, POLL_MAX_SNAPSHOT_AGE, POLL_LOG_HISTORY, TRANSFER_TRACKING_ENABLED
+from bot.balance_cache import BalanceReading
+from bot.csv_logger import log_to_csv
+from bot.transfer_tracker import TransferTracker
+from bot.usdt_checker import (
+    get_wallets_for_checking, get_usdt_trc20_balance, get_balance_cache, fetch_balances,
+)
+
+_active_poller = None
+
+
+class BalancePoller(threading.Thread):
+    """
+    Daemon thread that keeps wallet balances warm in the balance cache.
+
+    The first cycle fetches all wallets concurrently so the snapshot is ready
+    quickly; later cycles fetch one wallet every `interval / N` seconds to
+    avoid request bursts.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL, max_snapshot_age: float = POLL_MAX_SNAPSHOT_AGE):
+        super().__init__(name="balance-poller", daemon=True)
+        self.interval = interval
+        self.max_snapshot_age = max_snapshot_age
+        self.cycles = 0
+        self._addresses: set[str] = set()
+        self._stop_event = threading.Event()
+        self.tracker = TransferTracker() if TRANSFER_TRACKING_ENABLED else None
+
+    def run(self):
+        print(f"🔄 Balance poller started (interval {self.interval:g}s)")
+        first = True
+        while not self._stop_event.is_set():
+            try:
+                if first:
+                    self._warm_up()
+                else:
+                    self._poll_cycle()
+            except Exception as e:
+                print(f"❌ Balance poll failed: {e}")
+                self._stop_event.wait(self.interval)
+            first = False
+        print("🛑 Balance poller stopped")
+
+    def stop(self):
+        """Ask the poller to stop after the current request."""
+        self._stop_event.set()
+
+    def split_snapshot(self, wallets: dict[str, str]) -> tuple[dict[str, BalanceReading], dict[str, str]]:
+        """
+        Split wallets into those answerable from the snapshot and those needing a live fetch.
+
+        Args:
+            wallets: Dictionary mapping display names to Tron addresses
+
+        Returns:
+            tuple: (readings served from the snapshot, {name: address} still to fetch)
+        """
+        cache = get_balance_cache()
+        served = {}
+        remaining = {}
+        for name, address in wallets.items():
+            reading = cache.peek(address) if address in self._addresses else None
+            if reading is not None and reading.age < self.max_snapshot_age:
+                served[name] = reading
+            else:
+                remaining[name] = address
+        return served, remaining
+
+    def _warm_up(self):
+        wallets = get_wallets_for_checking()
+        self._addresses = set(wallets.values())
+        if wallets:
+            readings = fetch_balances(wallets)
+            # Cached or degraded readings are older than now; only fresh fetches go into history
+            self._log_history(wallets, {name: reading.balance for name, reading in readings.items()
+                                        if reading.age == 0 and not reading.degraded})
+        self.cycles += 1
+        self._stop_event.wait(self.interval)
+
+    def _poll_cycle(self):
+        started = time.monotonic()
+        wallets = get_wallets_for_checking()
+        if self.tracker is not None:
+            for address in self._addresses - set(wallets.values()):
+                self.tracker.forget(address)
+        self._addresses = set(wallets.values())
+        if not wallets:
+            self._stop_event.wait(self.interval)
+            return
+
+        cache = get_balance_cache()
+        spacing = self.interval / len(wallets)
+        failures = 0
+        balances = {}
+        for i, (name, address) in enumerate(wallets.items()):
+            if self._stop_event.is_set():
+                return
+            if self.tracker is not None:
+                balance = self.tracker.update(address)
+            else:
+                balance = get_usdt_trc20_balance(address)
+            if balance is not None:
+                cache.put(address, balance)
+                balances[name] = balance
+            else:
+                failures += 1
+            # Each wallet gets its own slot so the cycle stays aligned to the interval
+            next_slot = started + (i + 1) * spacing
+            self._stop_event.wait(max(0.0, next_slot - time.monotonic()))
+
+        self.cycles += 1
+        self._log_history(wallets, balances)
+        print(f"🔄 Balance poll #{self.cycles}: {len(wallets) - failures}/{len(wallets)} wallets refreshed "
+              f"in {time.monotonic() - started:.1f}s")
+        if self.tracker is not None:
+            self.tracker.save()
+            print(f"📒 Transfer tracker: {self.tracker.full_reads} full reads, {self.tracker.event_reads} event reads, "
+                  f"{self.tracker.transfers_applied} transfers applied")
+
+    def _log_history(self, wallets: dict[str, str], balances: dict):
+        if POLL_LOG_HISTORY and any(balance is not None for balance in balances.values()):
+            log_to_csv(wallets, balances)
+
+
+def start_balance_poller(interval: float = POLL_INTERVAL) -> BalancePoller:
+    """Start the process-wide balance poller (no-op if one is already running)."""
+    global _active_poller
+    if _active_poller is None or not _active_poller.is_alive():
+        _active_poller = BalancePoller(interval=interval)
+        _active_poller.start()
+    return _active_poller
+
+
+def stop_balance_poller():
+    """Stop the process-wide balance poller if it is running."""
+    global _active_poller
+    if _active_poller is not None:
+        _active_poller.stop()
+        _active_poller = None
+
+
+def get_active_poller() -> BalancePoller | None:
+    """Return the running poller, or None when balances are fetched on demand."""
+    if _active_poller is not None and _active_poller.is_alive():
+        return _active_poller
+    return None
@@ -0,0 +1,375 @@
+# bot/balance_providers.py
+"""
+Pluggable backends for fetching USDT TRC20 balances.
+Each provider tracks its own latency; a ProviderChain tries providers in order
+(failover) and can hedge a slow request by firing the next provider once the
+current one exceeds its usual latency percentile.
+"""
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+import time
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from decimal import Decimal
+
+from bot.config import (
+    USDT_CONTRACT, TRONSCAN_API_URL, TRONSCAN_API_KEY, TRONGRID_API_URL, TRONGRID_API_KEY,
+    LATENCY_WINDOW, HEDGE_MIN_SAMPLES, FETCH_MAX_WORKERS,
+    RATE_LIMIT_INITIAL, RATE_LIMIT_MIN, RATE_LIMIT_MAX, RATE_LIMIT_BURST, RATE_LIMIT_INCREASE,
+    RATE_LIMIT_DECREASE, RATE_LIMIT_LOG_INTERVAL,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT, CIRCUIT_HALF_OPEN_MAX_CALLS,
+)
+from bot.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED
+from bot.http_client import api_request_json
+from bot.rate_limiter import AdaptiveRateLimiter, RateLimitTimeout
+
+# USDT TRC20 has 6 decimal places (1,000,000 sun per USDT)
+USDT_DECIMALS = Decimal('1000000')
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+class BalanceFetchError(Exception):
+    """Raised when a provider (or every provider in a chain) cannot return a balance."""
+
+
+class InvalidAddressError(BalanceFetchError):
+    """The address itself is bad (not base58 or wrong checksum); not a provider failure."""
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies for one provider."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.successes += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def percentile(self, pct: float, min_samples: int = HEDGE_MIN_SAMPLES) -> float | None:
+        """
+        Latency at the given percentile, or None until enough samples exist.
+
+        Args:
+            pct: Percentile between 0 and 100
+            min_samples: Minimum samples required for a meaningful estimate
+        """
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> str:
+        p50 = self.percentile(50, min_samples=1)
+        p95 = self.percentile(95, min_samples=1)
+        if p50 is None:
+            return f"no samples, {self.failures} failures"
+        return f"p50={p50 * 1000:.0f}ms p95={p95 * 1000:.0f}ms, {self.successes} ok, {self.failures} failed"
+
+
+class BalanceProvider(ABC):
+    """
+    Base class for balance backends.
+    Subclasses implement _fetch() and raise on any error; fetch() adds
+    latency tracking and normalizes errors to BalanceFetchError.
+    Every provider owns an adaptive rate limiter that its HTTP calls share,
+    and a circuit breaker that makes calls fail fast while it is down.
+    """
+    name = "provider"
+
+    def __init__(self):
+        self.latency = LatencyTracker()
+        self.limiter = AdaptiveRateLimiter(
+            name=self.name,
+            rate=RATE_LIMIT_INITIAL,
+            burst=RATE_LIMIT_BURST,
+            min_rate=RATE_LIMIT_MIN,
+            max_rate=RATE_LIMIT_MAX,
+            increase_step=RATE_LIMIT_INCREASE,
+            decrease_factor=RATE_LIMIT_DECREASE,
+            log_interval=RATE_LIMIT_LOG_INTERVAL,
+        )
+        self.breaker = CircuitBreaker(
+            name=self.name,
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+            half_open_max_calls=CIRCUIT_HALF_OPEN_MAX_CALLS,
+        )
+
+    @property
+    def available(self) -> bool:
+        """False while the circuit breaker is open or half-open."""
+        return self.breaker.state == CLOSED
+
+    def fetch(self, address: str) -> Decimal:
+        """
+        Fetch the USDT balance for an address.
+
+        Args:
+            address: Tron wallet address
+
+        Returns:
+            Decimal: USDT balance
+
+        Raises:
+            InvalidAddressError: If the address does not decode (checked before any request)
+            BalanceFetchError: If the balance could not be fetched
+        """
+        # A bad address is the caller's fault and must not count against the circuit breaker
+        decode_address(address)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            raise BalanceFetchError(str(e))
+
+        start = time.monotonic()
+        try:
+            balance = self._fetch(address)
+        except Exception as e:
+            self.latency.record_failure()
+            self.breaker.record_failure()
+            raise self._as_fetch_error(e)
+
+        self.latency.record(time.monotonic() - start)
+        self.breaker.record_success()
+        return balance
+
+    def _as_fetch_error(self, error: Exception) -> BalanceFetchError:
+        """Translate any error raised by _fetch into a BalanceFetchError with a readable message."""
+        if isinstance(error, BalanceFetchError):
+            return error
+        if isinstance(error, RateLimitTimeout):
+            return BalanceFetchError(str(error))
+        if isinstance(error, requests.exceptions.Timeout):
+            return BalanceFetchError(f"{self.name}: request timed out")
+        if isinstance(error, requests.exceptions.HTTPError):
+            status = error.response.status_code if error.response is not None else "?"
+            return BalanceFetchError(f"{self.name}: HTTP error {status}")
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return BalanceFetchError(f"{self.name}: connection error")
+        if isinstance(error, requests.exceptions.RequestException):
+            return BalanceFetchError(f"{self.name}: request error: {error}")
+        if isinstance(error, ValueError):
+            return BalanceFetchError(f"{self.name}: invalid response: {error}")
+        return BalanceFetchError(f"{self.name}: unexpected error: {error}")
+
+    @abstractmethod
+    def _fetch(self, address: str) -> Decimal:
+        """Return the USDT balance for `address`; raise on any error."""
+
+
+class TronscanProvider(BalanceProvider):
+    """Tronscan account token list (`/api/account/tokens`)."""
+    name = "tronscan"
+
+    def __init__(self, base_url: str = TRONSCAN_API_URL, api_key: str | None = TRONSCAN_API_KEY):
+        super().__init__()
+        self.url = f"{base_url.rstrip('/')}/api/account/tokens"
+        self.headers = {"TRON-PRO-API-KEY": api_key} if api_key else None
+
+    def _fetch(self, address: str) -> Decimal:
+        data = api_request_json("GET", self.url, params={"address": address}, headers=self.headers,
+                                limiter=self.limiter).get("data", [])
+        if not data:
+            print(f"Warning: No token data found for address {address}")
+            return Decimal('0.0')
+
+        for token in data:
+            if token.get("tokenId") == USDT_CONTRACT:
+                raw_balance_str = token.get("balance", "0")
+                try:
+                    raw_balance = Decimal(raw_balance_str)
+                except Exception as e:
+                    raise BalanceFetchError(f"{self.name}: cannot convert balance '{raw_balance_str}': {e}")
+                return raw_balance / USDT_DECIMALS
+
+        # USDT token not found for this address
+        return Decimal('0.0')
+
+
+class TronGridProvider(BalanceProvider):
+    """Full-node `balanceOf` call on the USDT contract via TronGrid (`/wallet/triggerconstantcontract`)."""
+    name = "trongrid"
+
+    def __init__(self, base_url: str = TRONGRID_API_URL, api_key: str | None = TRONGRID_API_KEY):
+        super().__init__()
+        self.url = f"{base_url.rstrip('/')}/wallet/triggerconstantcontract"
+        self.headers = {"TRON-PRO-API-KEY": api_key} if api_key else None
+
+    def _fetch(self, address: str) -> Decimal:
+        payload = {
+            "owner_address": address,
+            "contract_address": USDT_CONTRACT,
+            "function_selector": "balanceOf(address)",
+            "parameter": _abi_encode_address(address),
+            "visible": True,
+        }
+        body = api_request_json("POST", self.url, json_body=payload, headers=self.headers,
+                                limiter=self.limiter)
+        result = body.get("result", {})
+        if not result.get("result"):
+            raise BalanceFetchError(f"{self.name}: contract call failed: {result.get('message', 'no result')}")
+
+        constant_result = body.get("constant_result") or []
+        if not constant_result:
+            raise BalanceFetchError(f"{self.name}: empty contract result")
+        return Decimal(int(constant_result[0], 16)) / USDT_DECIMALS
+
+
+def decode_address(address: str) -> bytes:
+    """
+    Decode a base58check Tron address to its 21-byte payload (0x41 prefix + 20-byte account).
+
+    Raises:
+        InvalidAddressError: On characters outside the base58 alphabet, bad length or checksum
+    """
+    num = 0
+    try:
+        for char in address:
+            num = num * 58 + BASE58_ALPHABET.index(char)
+        raw = num.to_bytes(25, "big")
+    except (ValueError, OverflowError):
+        raise InvalidAddressError(f"Invalid address: {address}")
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        raise InvalidAddressError(f"Invalid address checksum: {address}")
+    return payload
+
+
+def _abi_encode_address(address: str) -> str:
+    """ABI-encode a base58 Tron address as a 32-byte hex word (drops the 0x41 prefix)."""
+    return decode_address(address)[1:].hex().rjust(64, "0")
+
+
+PROVIDER_CLASSES = {
+    "tronscan": TronscanProvider,
+    "trongrid": TronGridProvider,
+}
+
+
+class ProviderChain:
+    """
+    Ordered list of providers with failover and optional hedged requests.
+
+    Without hedging, providers are tried one after another until one succeeds.
+    With `hedge_percentile` set, a request that runs longer than the current
+    provider's latency at that percentile triggers the next provider in
+    parallel; whichever answers first wins.
+    """
+
+    def __init__(self, providers: list[BalanceProvider], hedge_percentile: float | None = None,
+                 max_workers: int = FETCH_MAX_WORKERS * 2):
+        if not providers:
+            raise ValueError("ProviderChain needs at least one provider")
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.hedges = 0
+        self._executor = None
+        if hedge_percentile is not None and len(providers) > 1:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="balance-hedge")
+
+    def fetch(self, address: str) -> Decimal:
+        """
+        Fetch a balance from the first provider that answers successfully.
+
+        Raises:
+            InvalidAddressError: If the address does not decode (no provider is tried)
+            BalanceFetchError: If every provider failed
+        """
+        decode_address(address)
+        if self._executor is None:
+            return self._fetch_failover(address)
+        return self._fetch_hedged(address)
+
+    def _fetch_failover(self, address: str) -> Decimal:
+        errors = []
+        for provider in self.providers:
+            try:
+                return provider.fetch(address)
+            except BalanceFetchError as e:
+                errors.append(str(e))
+        raise BalanceFetchError("; ".join(errors))
+
+    def _fetch_hedged(self, address: str) -> Decimal:
+        remaining = list(self.providers)
+        pending = {}
+        errors = []
+        last_provider = None
+        last_started = 0.0
+
+        def launch():
+            nonlocal last_provider, last_started
+            provider = remaining.pop(0)
+            pending[self._executor.submit(provider.fetch, address)] = provider
+            last_provider, last_started = provider, time.monotonic()
+
+        launch()
+        while pending:
+            timeout = None
+            if remaining:
+                threshold = last_provider.latency.percentile(self.hedge_percentile)
+                if threshold is not None:
+                    timeout = max(0.0, threshold - (time.monotonic() - last_started))
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slower than its usual p-th percentile - race the next provider against it
+                self.hedges += 1
+                print(f"Hedging {address}: {last_provider.name} slower than p{self.hedge_percentile:g}, "
+                      f"trying {remaining[0].name}")
+                launch()
+                continue
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except BalanceFetchError as e:
+                    errors.append(str(e))
+
+            if not pending and remaining:
+                launch()
+
+        raise BalanceFetchError("; ".join(errors))
+
+    def unavailable_providers(self) -> list[str]:
+        """Names of providers whose circuit is currently not closed."""
+        return [p.name for p in self.providers if not p.available]
+
+    def latency_report(self) -> str:
+        """One line per provider with its circuit state, latency percentiles and counters."""
+        return "\n".join(f"{p.name} [{p.breaker.state}]: {p.latency.summary()}" for p in self.providers)
+
+
+def build_provider_chain(names: list[str], hedge_percentile: float | None = None) -> ProviderChain:
+    """
+    Build a provider chain from configured provider names.
+
+    Args:
+        names: Provider names in failover order (keys of PROVIDER_CLASSES)
+        hedge_percentile: Latency percentile that triggers a hedged request, or None
+
+    Returns:
+        ProviderChain: Chain of instantiated providers
+    """
+    providers = []
+    for name in names:
+        provider_class = PROVIDER_CLASSES.get(name)
+        if provider_class is None:
+            print(f"⚠️ Unknown balance provider '{name}' - skipping")
+            continue
+        providers.append(provider_class())
+    return ProviderChain(providers, hedge_percentile=hedge_percentile)
@@ -0,0 +1,112 @@
+# bot/chart_cache.py
+"""
+On-disk cache for rendered charts.
+Entries are keyed by a fingerprint of the plotted data window, the wallet
+set and the render options, so an unchanged chart is served without
+redrawing. The directory is kept under a byte budget by evicting the least
+recently used files (hits refresh a file's mtime). Files used within the
+last CHART_CACHE_EVICT_GRACE seconds are never evicted, because the path
+handed out by get()/store() is uploaded afterwards, possibly while another
+chart worker process is storing a new render.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+from bot.config import CHART_CACHE_DIR, CHART_CACHE_MAX_BYTES, CHART_CACHE_EVICT_GRACE
+
+# Bump when the chart layout changes so old renders are not served
+RENDER_VERSION = 1
+
+
+class ChartCache:
+    """Size-bounded LRU directory of rendered PNGs."""
+
+    def __init__(self, directory: str = CHART_CACHE_DIR, max_bytes: int = CHART_CACHE_MAX_BYTES,
+                 evict_grace: float = CHART_CACHE_EVICT_GRACE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evict_grace = evict_grace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(df: pd.DataFrame, **options) -> str:
+        """Fingerprint of the data window (values, columns, order) plus render options."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([RENDER_VERSION, list(map(str, df.columns)), options],
+                                 sort_keys=True, default=str).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        return digest.hexdigest()[:32]
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached file path for `key`, or None. A hit marks the entry as recently used."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def temp_path(self, key: str) -> str:
+        """Where to render a new entry before `store()` publishes it."""
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp.png")
+
+    def store(self, key: str, rendered_path: str) -> str:
+        """Atomically publish a rendered file under `key` and enforce the size budget."""
+        path = self.path_for(key)
+        os.replace(rendered_path, path)
+        self._evict(keep=path)
+        return path
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _evict(self, keep: str):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".png") and ".tmp." not in entry.name:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    # Re-check: a hit in another process may have touched it since the scan
+                    if os.stat(path).st_mtime > time.time() - self.evict_grace:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+
+_chart_cache = None
+
+
+def get_chart_cache() -> ChartCache:
+    global _chart_cache
+    if _chart_cache is None:
+        _chart_cache = ChartCache()
+    return _chart_cache
@@ -0,0 +1,104 @@
+# bot/chart_renderer.py
+"""
+Off-thread chart rendering for the Slack listener.
+Matplotlib is CPU-heavy and not thread-safe, so charts are drawn in a small
+pool of worker processes (Agg backend) instead of the socket-mode handler
+threads. Each chart can use its own core, and a bounded number of requests
+may be queued or running at once so a burst of !chart commands cannot pile
+up behind each other.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional, Tuple
+
+from bot.config import CHART_WORKERS, CHART_QUEUE_LIMIT, CHART_RENDER_TIMEOUT, NUM_RECORDS_TO_PLOT
+from bot.balance_log import flush_balance_logs
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(CHART_QUEUE_LIMIT)
+
+
+def _init_worker():
+    """Select the non-interactive backend before pyplot is imported in the worker."""
+    os.environ["MPLBACKEND"] = "Agg"
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render(wallets: Optional[List[str]], resolution: Optional[str], num_records: int,
+            full: bool) -> Optional[str]:
+    """Runs in a worker process; returns the cached PNG path or None if there is nothing to plot."""
+    from bot.visualizer import plot_wallet_trends
+    return plot_wallet_trends(wallets=wallets, resolution=resolution, num_records=num_records,
+                              preview=not full)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, not fork: the listener has live threads (poller, log flusher, socket client)
+            _executor = ProcessPoolExecutor(
+                max_workers=CHART_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            print(f"🖼️ Chart renderer started ({CHART_WORKERS} worker process(es))")
+        return _executor
+
+
+def render_chart(wallets: Optional[List[str]] = None, resolution: Optional[str] = None,
+                 num_records: int = NUM_RECORDS_TO_PLOT, full: bool = False,
+                 timeout: float = CHART_RENDER_TIMEOUT) -> Tuple[bool, str]:
+    """
+    Render a wallet trend chart in the process pool and wait for it.
+
+    Args:
+        wallets: Wallet names to plot (default: all)
+        resolution: None for raw snapshots, "hour" or "day" for rollups
+        num_records: Snapshots (or rollup buckets) to plot
+        full: Full-resolution image instead of the low-dpi preview
+        timeout: Seconds to wait for the image
+
+    Returns:
+        Tuple[bool, str]: (success, image path or error message)
+    """
+    if not _slots.acquire(blocking=False):
+        return False, f"⏳ Chart renderer is busy ({CHART_QUEUE_LIMIT} charts queued). Please try again shortly."
+
+    try:
+        # Buffered history rows live in this process; commit them so the worker sees them
+        flush_balance_logs()
+        future = _get_executor().submit(_render, wallets, resolution, num_records, full)
+    except Exception as e:
+        _slots.release()
+        print(f"❌ Error submitting chart render: {e}")
+        return False, "❌ Chart renderer is unavailable."
+    # The slot is held until the worker is done, even if we stop waiting for it
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        path = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        print(f"⏰ Chart render timed out after {timeout:g}s")
+        return False, f"⏰ Chart took longer than {timeout:g}s to render. Please try again later."
+    except Exception as e:
+        print(f"❌ Chart render failed: {e}")
+        return False, "❌ Failed to render chart."
+
+    if path is None:
+        return False, "ℹ️ Not enough balance history to plot yet."
+    return True, path
+
+
+def shutdown_chart_renderer():
+    """Stop the worker processes (called on listener shutdown)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,227 @@
+# bot/check_progress.py
+"""
+Progressive !check replies.
+Collects wallet readings as they arrive and republishes a partial reply
+(finished wallets with balances, the rest marked as pending) through a
+caller-supplied `publish(text)` - in practice a Slack chat_update on a
+placeholder message. Each reply is edited at most once per
+CHECK_PROGRESS_INTERVAL seconds, and all replies share one edit limiter
+(CHECK_EDIT_RATE), so concurrent !check runs together stay inside Slack's
+chat.update limit. Progress edits are skipped when no slot is free; the
+final reply waits for one, retries after a 429 and otherwise falls back
+to posting a new message.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from bot.config import (CHECK_PROGRESS_INTERVAL, CHECK_EDIT_RATE, CHECK_EDIT_BURST, CHECK_FINAL_EDIT_WAIT,
+                        API_RETRY_AFTER_MAX)
+from bot.balance_cache import BalanceReading
+from bot.rate_limiter import AdaptiveRateLimiter, RateLimitTimeout
+from bot.usdt_checker import describe_reading
+
+_edit_limiter = AdaptiveRateLimiter(
+    name="slack-edits",
+    rate=CHECK_EDIT_RATE,
+    burst=CHECK_EDIT_BURST,
+    min_rate=CHECK_EDIT_RATE / 10,
+    max_rate=CHECK_EDIT_RATE,
+    increase_step=0.05,
+    decrease_factor=0.5,
+    log_interval=3600,
+)
+
+
+def get_edit_limiter() -> AdaptiveRateLimiter:
+    """Process-wide limiter for chat.update calls made by streaming replies."""
+    return _edit_limiter
+
+
+def slack_retry_after(error: Exception) -> Optional[float]:
+    """Retry-After seconds if `error` is a Slack 429 response, else None."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return None
+    try:
+        return float(response.headers.get("Retry-After", 1))
+    except (TypeError, ValueError, AttributeError):
+        return 1.0
+
+
+def _try_edit_slot(limiter: AdaptiveRateLimiter) -> bool:
+    try:
+        limiter.acquire(timeout=0)
+        return True
+    except RateLimitTimeout:
+        return False
+
+
+def _record_edit_error(limiter: AdaptiveRateLimiter, error: Exception):
+    retry_after = slack_retry_after(error)
+    if retry_after is not None:
+        limiter.on_throttled(retry_after)
+    else:
+        print(f"❌ Error publishing !check progress: {error}")
+
+
+def format_reading_line(display_name: str, reading: BalanceReading) -> str:
+    """One `• **name**: balance` line of a !check reply."""
+    if reading.balance is not None:
+        return f"• **{display_name}**: {reading.balance:,.2f} USDT _({describe_reading(reading)})_"
+    return f"• **{display_name}**: ❌ Unable to fetch balance"
+
+
+class CheckProgress:
+    """
+    Partial state of one !check: readings so far for a fixed, ordered set of wallets.
+    `record()` may be called from any thread.
+    """
+
+    def __init__(self, wallet_names, readings: Optional[Dict[str, BalanceReading]] = None):
+        self.wallet_names = list(wallet_names)
+        self._readings: Dict[str, BalanceReading] = dict(readings or {})
+        self._lock = threading.Lock()
+        self._version = 1 if self._readings else 0
+
+    def record(self, name: str, reading: BalanceReading):
+        with self._lock:
+            self._readings[name] = reading
+            self._version += 1
+
+    @property
+    def version(self) -> int:
+        """Increases with every recorded reading; used to skip edits when nothing changed."""
+        with self._lock:
+            return self._version
+
+    def render(self) -> str:
+        with self._lock:
+            readings = dict(self._readings)
+        lines = []
+        total = 0
+        for name in self.wallet_names:
+            reading = readings.get(name)
+            if reading is None:
+                lines.append(f"• **{name}**: ⏳ fetching...")
+            else:
+                lines.append(format_reading_line(name, reading))
+                if reading.balance is not None:
+                    total += reading.balance
+        done = sum(1 for name in self.wallet_names if name in readings)
+        header = f"⏳ **Checking balances:** {done} of {len(self.wallet_names)} done"
+        footer = f"\n\n📊 **Running total:** {total:,.2f} USDT" if len(self.wallet_names) > 1 else ""
+        return f"{header}\n\n" + "\n".join(lines) + footer
+
+
+class ProgressPublisher(threading.Thread):
+    """Publishes a CheckProgress whenever it changed, at most once per `interval` seconds."""
+
+    def __init__(self, progress: CheckProgress, publish: Callable[[str], None],
+                 interval: float = CHECK_PROGRESS_INTERVAL, limiter: Optional[AdaptiveRateLimiter] = None):
+        super().__init__(name="check-progress", daemon=True)
+        self.progress = progress
+        self.publish = publish
+        self.interval = interval
+        self.limiter = limiter or get_edit_limiter()
+        self.updates = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        published = 0
+        while not self._stop_event.is_set():
+            version = self.progress.version
+            if version != published and _try_edit_slot(self.limiter):
+                published = version
+                try:
+                    self.publish(self.progress.render())
+                    self.limiter.on_success()
+                    self.updates += 1
+                except Exception as e:
+                    _record_edit_error(self.limiter, e)
+                self._stop_event.wait(self.interval)
+            else:
+                # Nothing new yet (or no shared edit slot free); poll again soon
+                self._stop_event.wait(min(0.1, self.interval))
+
+    def stop(self):
+        """Stop publishing; the final reply is posted by the caller."""
+        self._stop_event.set()
+        self.join()
+
+
+async def publish_progress_async(progress: CheckProgress, publish: Callable[[str], object],
+                                 interval: float = CHECK_PROGRESS_INTERVAL,
+                                 limiter: Optional[AdaptiveRateLimiter] = None):
+    """Asyncio counterpart of ProgressPublisher; `publish` is awaited. Runs until cancelled."""
+    limiter = limiter or get_edit_limiter()
+    published = 0
+    while True:
+        version = progress.version
+        if version != published and _try_edit_slot(limiter):
+            published = version
+            try:
+                await publish(progress.render())
+                limiter.on_success()
+            except Exception as e:
+                _record_edit_error(limiter, e)
+            await asyncio.sleep(interval)
+        else:
+            await asyncio.sleep(min(0.1, interval))
+
+
+def publish_final(update: Callable[[], object], post: Callable[[], object],
+                  limiter: Optional[AdaptiveRateLimiter] = None):
+    """
+    Replace the placeholder with the final reply without losing it to a rate limit.
+    Waits up to CHECK_FINAL_EDIT_WAIT for an edit slot, retries once after a 429's
+    Retry-After, and posts the reply as a new message if the edit still fails.
+
+    Args:
+        update: Edits the placeholder (chat.update)
+        post: Posts the reply as a new message (chat.postMessage)
+    """
+    limiter = limiter or get_edit_limiter()
+    try:
+        limiter.acquire(timeout=CHECK_FINAL_EDIT_WAIT)
+    except RateLimitTimeout:
+        pass  # edit anyway; a 429 is handled below
+    for attempt in range(2):
+        try:
+            update()
+            limiter.on_success()
+            return
+        except Exception as e:
+            retry_after = slack_retry_after(e)
+            if retry_after is None:
+                print(f"❌ Error editing !check reply, posting it instead: {e}")
+                break
+            limiter.on_throttled(retry_after)
+            if attempt == 0:
+                time.sleep(min(retry_after, API_RETRY_AFTER_MAX))
+    post()
+
+
+async def publish_final_async(update: Callable[[], object], post: Callable[[], object],
+                              limiter: Optional[AdaptiveRateLimiter] = None):
+    """Asyncio counterpart of publish_final; `update` and `post` are coroutine functions."""
+    limiter = limiter or get_edit_limiter()
+    try:
+        await asyncio.to_thread(limiter.acquire, CHECK_FINAL_EDIT_WAIT)
+    except RateLimitTimeout:
+        pass
+    for attempt in range(2):
+        try:
+            await update()
+            limiter.on_success()
+            return
+        except Exception as e:
+            retry_after = slack_retry_after(e)
+            if retry_after is None:
+                print(f"❌ Error editing !check reply, posting it instead: {e}")
+                break
+            limiter.on_throttled(retry_after)
+            if attempt == 0:
+                await asyncio.sleep(min(retry_after, API_RETRY_AFTER_MAX))
+    await post()
@@ -0,0 +1,91 @@
+# bot/circuit_breaker.py
+"""
+Circuit breaker for upstream balance providers.
+After repeated failures the circuit opens and calls fail immediately instead
+of each waiting out the full API timeout; after a cool-down a limited number
+of trial calls decide whether to close it again.
+"""
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    - closed: calls pass through; `failure_threshold` consecutive failures open it.
+    - open: calls are rejected until `recovery_timeout` seconds have passed.
+    - half-open: up to `half_open_max_calls` trial calls pass; one success
+      closes the circuit, one failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def before_call(self):
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with all trial slots taken)
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == OPEN:
+                raise CircuitOpenError(f"{self.name}: circuit open")
+            if state == HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"{self.name}: circuit half-open, trial call in progress")
+                self._half_open_calls += 1
+
+    def record_success(self):
+        """Record a successful call; closes a half-open circuit."""
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"✅ Circuit for {self.name} closed - upstream recovered")
+            self._state = CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+
+    def record_failure(self):
+        """Record a failed call; may open the circuit."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            self._failures += 1
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != OPEN:
+                    print(f"⚠️ Circuit for {self.name} opened after {self._failures} failure(s) - "
+                          f"failing fast for {self.recovery_timeout:g}s")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def _current_state(self, now: float) -> str:
+        """Move an open circuit to half-open once the cool-down has passed. Caller must hold the lock."""
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
@@ -0,0 +1,104 @@
+# bot/command_dispatcher.py
+"""
+Bounded, prioritized worker pool for Slack commands.
+The socket-mode callback only acknowledges and validates an event, then
+hands the command to this pool. A fixed number of worker threads take the
+highest-priority queued command whose per-command concurrency limit has
+room, so a cheap !help or !list is picked up ahead of queued !check runs
+and never waits for a slow fetch to finish. When the queue is full, new
+commands are refused and the caller replies "busy".
+"""
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, Optional
+
+from bot.config import COMMAND_WORKERS, COMMAND_QUEUE_LIMIT, COMMAND_CONCURRENCY, COMMAND_PRIORITY
+
+DEFAULT_PRIORITY = 5
+
+
+class CommandDispatcher:
+    """
+    Worker threads pulling from a priority queue (lower number runs first,
+    FIFO within a priority) with a per-command cap on running jobs.
+    """
+
+    def __init__(self, max_workers: int = COMMAND_WORKERS, queue_limit: int = COMMAND_QUEUE_LIMIT,
+                 concurrency: Optional[Dict[str, int]] = None, priority: Optional[Dict[str, int]] = None):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.concurrency = dict(COMMAND_CONCURRENCY if concurrency is None else concurrency)
+        self.priority = dict(COMMAND_PRIORITY if priority is None else priority)
+        self.rejected = 0
+        self._queue: list = []  # heap of (priority, sequence, command, fn, args)
+        self._running: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"command-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, command: str, fn: Callable, *args) -> bool:
+        """
+        Queue `fn(*args)` for `command`.
+
+        Returns:
+            bool: False if the queue is full (or the pool is stopped) and the job was dropped
+        """
+        with self._condition:
+            if self._stopped or len(self._queue) >= self.queue_limit:
+                self.rejected += 1
+                return False
+            heapq.heappush(self._queue, (self.priority.get(command, DEFAULT_PRIORITY), next(self._sequence),
+                                         command, fn, args))
+            self._condition.notify()
+            return True
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"queued": len(self._queue), "running": dict(self._running), "rejected": self.rejected}
+
+    def shutdown(self, timeout: float = 5.0):
+        """Drop queued commands and wait briefly for running ones."""
+        with self._condition:
+            self._stopped = True
+            self._queue.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _next_job(self):
+        """Pop the highest-priority job whose command is under its limit. Caller holds the condition."""
+        for entry in sorted(self._queue):
+            command = entry[2]
+            limit = self.concurrency.get(command)
+            if limit is None or self._running.get(command, 0) < limit:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                return entry
+        return None
+
+    def _work(self):
+        while True:
+            with self._condition:
+                job = None
+                while not self._stopped and (job := self._next_job()) is None:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                _, _, command, fn, args = job
+                self._running[command] = self._running.get(command, 0) + 1
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"❌ Error running queued command {command}: {e}")
+            finally:
+                with self._condition:
+                    self._running[command] -= 1
+                    # A finished job may unblock a command that was held back by its limit
+                    self._condition.notify_all()
@@ -59,11 +59,107 @@ SLACK_APP_TOKEN = os.getenv("SLACK_APP_TOKEN")  # For Socket Mode
 
 # --- API Configuration ---
 API_TIMEOUT = 10  # seconds for API requests
+API_MAX_RETRIES = 3  # retries after the first attempt for transient errors
+API_BACKOFF_BASE = 0.5  # seconds, doubled per retry (with full jitter)
+API_BACKOFF_MAX = 8  # seconds, cap for a single backoff delay
+API_RETRY_AFTER_MAX = 30  # seconds, longest Retry-After we are willing to wait
+API_RETRY_STATUSES = (429, 500, 502, 503, 504)  # HTTP statuses worth retrying
+HTTP_POOL_SIZE = 8  # keep-alive connections kept per host
 USDT_CONTRACT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"  # Official USDT TRC20 contract
 
+# --- Balance Providers ---
+TRONSCAN_API_URL = os.getenv("TRONSCAN_API_URL", "https://apilist.tronscanapi.com")
+TRONSCAN_API_KEY = os.getenv("TRONSCAN_API_KEY")
+TRONGRID_API_URL = os.getenv("TRONGRID_API_URL", "https://api.trongrid.io")
+TRONGRID_API_KEY = os.getenv("TRONGRID_API_KEY")
+BALANCE_PROVIDERS = ["tronscan", "trongrid"]  # failover order
+HEDGE_PERCENTILE = 95  # fire the next provider once a request exceeds this latency percentile (None disables)
+HEDGE_MIN_SAMPLES = 20  # latency samples needed before hedging kicks in
+LATENCY_WINDOW = 200  # recent latency samples kept per provider
+
+# --- Rate Limiting (per provider, adapts to 429 / Retry-After) ---
+RATE_LIMIT_INITIAL = 5.0  # requests per second at startup
+RATE_LIMIT_MIN = 0.5  # never slow down below this
+RATE_LIMIT_MAX = 20.0  # never speed up beyond this
+RATE_LIMIT_BURST = 3  # token bucket size
+RATE_LIMIT_INCREASE = 0.2  # requests/second gained per second of successful traffic
+RATE_LIMIT_DECREASE = 0.5  # rate multiplier applied on every 429
+RATE_LIMIT_LOG_INTERVAL = 60  # seconds between limiter status log lines
+
+# --- Circuit Breaker (per provider) ---
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before the circuit opens
+CIRCUIT_RECOVERY_TIMEOUT = 30  # seconds to fail fast before allowing a trial request
+CIRCUIT_HALF_OPEN_MAX_CALLS = 1  # trial requests allowed while half-open
+
+# --- Balance Fetching ---
+FETCH_MAX_WORKERS = 8  # max concurrent balance requests
+FETCH_DEADLINE = 20  # seconds for a full multi-wallet fetch before giving up on stragglers
+CHECK_PROGRESS_INTERVAL = 1.5  # seconds between in-place edits of a streaming !check reply (Slack rate limits)
+CHECK_EDIT_RATE = 0.6  # chat.update calls/s shared by all streaming !check replies (Slack Tier 3 is ~50/min)
+CHECK_EDIT_BURST = 3  # progress edits allowed back to back
+CHECK_FINAL_EDIT_WAIT = 10  # seconds the final !check edit waits for an edit slot before trying anyway
+IMPORT_MAX_ROWS = 500  # rows accepted by one !import
+IMPORT_DEADLINE = 60  # seconds for the balance checks of a whole !import batch
+
+# --- Balance Cache ---
+BALANCE_CACHE_TTL = 60  # seconds a cached balance is served without refreshing
+BALANCE_CACHE_STALE_TTL = 600  # seconds a stale balance may be served while it refreshes in the background
+BALANCE_CACHE_MAX_ENTRIES = 5000  # least recently used addresses are evicted beyond this
+
+# --- Background Poller (slack_listener only) ---
+POLL_ENABLED = True  # keep wallet balances warm in memory while the listener runs
+POLL_INTERVAL = 300  # seconds for one full pass over all wallets
+POLL_MAX_SNAPSHOT_AGE = 900  # seconds before a snapshot value is considered too old to serve
+POLL_LOG_HISTORY = True  # append every completed poll cycle to the balance history
+
+# --- Incremental Transfer Tracking (used by the poller, needs TronGrid) ---
+TRANSFER_TRACKING_ENABLED = False  # apply USDT Transfer events as deltas instead of re-reading balances
+TRANSFER_STATE_FILE = "transfer_state.json"  # per-wallet cursors and tracked balances
+TRANSFER_RECONCILE_INTERVAL = 6 * 3600  # seconds between full balance re-reads per wallet
+TRANSFER_PAGE_LIMIT = 200  # transfers requested per page
+TRANSFER_CURSOR_MARGIN = 180  # seconds re-scanned behind the cursor, so transfers the indexer confirms late are not missed
+
 # --- File Paths ---
-WALLETS_FILE = "wallets.json"
-CSV_FILE = "wallet_balances.csv"
+WALLETS_FILE = os.getenv("WALLETS_FILE", "wallets.json")
+CSV_FILE = os.getenv("CSV_FILE", "wallet_balances.csv")  # legacy wide-format history
+BALANCE_LOG_FORMAT = os.getenv("BALANCE_LOG_FORMAT", "long").lower()  # "long" (BALANCE_LOG_FILE) or "wide" (CSV_FILE)
+BALANCE_LOG_FILE = os.getenv("BALANCE_LOG_FILE", "balance_log.csv")  # timestamp,wallet,address,balance rows
+BALANCE_LOG_FLUSH_INTERVAL = 30  # seconds between group commits of buffered history rows
+BALANCE_LOG_MAX_BUFFER = 1000  # buffered rows that force an immediate commit
+HISTORY_COLUMNAR_ENABLED = False  # compact the balance log into monthly Parquet files (needs pyarrow)
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")  # month=YYYY-MM/part-0.parquet partitions
+HISTORY_COMPACT_INTERVAL = 3600  # seconds between compactions of the hot balance log
+ROLLUPS_ENABLED = True  # keep hourly/daily OHLC rollups per wallet and company as snapshots are logged
+ROLLUP_DB_FILE = os.getenv("ROLLUP_DB_FILE", "rollups.db")
+WALLET_JOURNAL_COMPACT_EVERY = 50  # journaled !add/!remove changes before folding them into wallets.json
+
+# --- Storage Backend ---
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").lower()  # "json" (wallets.json + CSV) or "sqlite"
+SQLITE_DB_FILE = os.getenv("SQLITE_DB_FILE", "wallets.db")
+
+# --- Charts ---
+NUM_RECORDS_TO_PLOT = 48  # most recent snapshots shown in trend charts
+CHART_MAX_POINTS = 500  # LTTB downsamples each wallet's line to at most this many points
+CHART_MARKER_MAX_POINTS = 100  # draw point markers only when a line has this few points
+CHART_PREVIEW_DPI = 100  # resolution of quick previews posted by !chart (full renders use 300)
+CHART_MAX_RECORDS = 50000  # longest window !chart accepts, in snapshots
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", "chart_cache")  # rendered charts keyed by data fingerprint
+CHART_CACHE_MAX_BYTES = 50 * 1024 * 1024  # LRU eviction keeps the cache directory under this size
+CHART_CACHE_EVICT_GRACE = 300  # seconds after a hit/store during which a file is never evicted (it may be uploading)
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))  # processes rendering !chart images in parallel
+CHART_QUEUE_LIMIT = 8  # !chart requests queued or rendering at once; more are turned away
+CHART_RENDER_TIMEOUT = 60  # seconds to wait for one chart before giving up
+
+# --- Command Handling (slack_listener) ---
+LISTENER_MODE = os.getenv("LISTENER_MODE", "threaded").lower()  # "threaded" or "async" (needs aiohttp)
+COMMAND_WORKERS = 6  # threads running Slack commands; keep above the sum of COMMAND_CONCURRENCY so !help/!list always find one free
+COMMAND_QUEUE_LIMIT = 20  # queued commands before new ones get a "busy" reply
+COMMAND_CONCURRENCY = {"!check": 2, "!chart": 2, "!import": 1}  # running at once per command (others unlimited)
+COMMAND_PRIORITY = {"!help": 0, "!list": 0, "!add": 1, "!remove": 1,
+                    "!check": 2, "!chart": 3, "!import": 3}  # lower runs first
+EVENT_DEDUP_TTL = 600  # seconds an event_id/client_msg_id is remembered; covers Slack's retries and reconnect replays
+EVENT_DEDUP_MAX_ENTRIES = 5000  # oldest keys are dropped beyond this
+EVENT_DEDUP_FILE = os.getenv("EVENT_DEDUP_FILE")  # optional path; keeps seen events across restarts (memory only if unset)
 
 # --- Timezone ---
 GMT_OFFSET = 7  # GMT+7 timezone offset
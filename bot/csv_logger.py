@@ -2,29 +2,48 @@
 """
 Module for logging wallet balance data to a CSV file.
 Ensures consistent data format and handles file operations robustly.
+By default snapshots go to the long-format balance log (bot.balance_log);
+BALANCE_LOG_FORMAT=wide keeps the legacy one-column-per-wallet CSV.
+With STORAGE_BACKEND=sqlite snapshots go to the balance_history table instead.
+Every snapshot also updates the hourly/daily rollups (bot.rollups).
 """
 import csv
 import os
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 
-from bot.config import CSV_FILE, GMT_OFFSET
+from bot.config import CSV_FILE, GMT_OFFSET, STORAGE_BACKEND, BALANCE_LOG_FORMAT, BALANCE_LOG_FILE, ROLLUPS_ENABLED
 
 
-def log_to_csv(wallets: dict, balances: dict, csv_filename: str = CSV_FILE):
+def log_to_csv(wallets: dict, balances: dict, csv_filename: str | None = None):
     """
     Logs wallet balances to a CSV file. Appends new data rows.
     Creates the file and writes headers if it doesn't exist or is empty.
+    In long format, wallets without a balance are left out instead of logged as 0.
 
     Args:
         wallets (dict): Dictionary mapping wallet names to their addresses
         balances (dict): Dictionary mapping wallet names to their current USDT balances
-        csv_filename (str): CSV file path. Defaults to configured CSV_FILE
+        csv_filename (str | None): CSV file path. Defaults to BALANCE_LOG_FILE or CSV_FILE
+            depending on BALANCE_LOG_FORMAT
     """
     # Generate timestamp in GMT+7
     gmt_now = datetime.now(timezone(timedelta(hours=GMT_OFFSET)))
     timestamp_str = gmt_now.isoformat()
 
+    if ROLLUPS_ENABLED:
+        _update_rollups(timestamp_str, wallets, balances)
+
+    if STORAGE_BACKEND == "sqlite":
+        _log_to_sqlite(timestamp_str, {name: balances[name] for name in wallets if balances.get(name) is not None})
+        return
+
+    if BALANCE_LOG_FORMAT == "long":
+        _log_long(timestamp_str, wallets, balances, csv_filename or BALANCE_LOG_FILE)
+        return
+
+    csv_filename = csv_filename or CSV_FILE
+
     # Define header and data rows
     header_row = ["Timestamp"] + list(wallets.keys())
     data_row = [timestamp_str] + [balances.get(name, Decimal('0.0')) for name in wallets.keys()]
@@ -44,4 +63,41 @@ def log_to_csv(wallets: dict, balances: dict, csv_filename: str = CSV_FILE):
     except IOError as e:
         print(f"❌ Error writing to CSV file '{csv_filename}': {e}")
     except Exception as e:
-        print(f"❌ Unexpected error logging to CSV: {e}")
\ No newline at end of file
+        print(f"❌ Unexpected error logging to CSV: {e}")
+
+
+def _log_long(timestamp_str: str, wallets: dict, balances: dict, log_filename: str):
+    from bot.balance_log import get_balance_log
+
+    try:
+        rows = [(name, address, balances[name]) for name, address in wallets.items()
+                if balances.get(name) is not None]
+        get_balance_log(log_filename).append(timestamp_str, rows)
+    except Exception as e:
+        print(f"❌ Error buffering balances for '{log_filename}': {e}")
+
+
+def _update_rollups(timestamp_str: str, wallets: dict, balances: dict):
+    from bot import rollups
+    from bot.wallet_registry import get_wallet_registry
+
+    try:
+        registry = get_wallet_registry()
+        companies = {}
+        for name in wallets:
+            info = registry.get(name)
+            companies[name] = info.get('company', 'Unknown') if info else 'Unknown'
+        rollups.record_snapshot(timestamp_str, {name: balances.get(name) for name in wallets},
+                                companies, registry.companies())
+    except Exception as e:
+        print(f"❌ Error updating balance rollups: {e}")
+
+
+def _log_to_sqlite(timestamp_str: str, balances: dict):
+    from bot import sqlite_store
+
+    try:
+        rows = sqlite_store.log_balances(timestamp_str, balances)
+        print(f"✅ Balances logged to {sqlite_store.SQLITE_DB_FILE} ({rows} rows)")
+    except Exception as e:
+        print(f"❌ Error writing balances to SQLite: {e}")
@@ -0,0 +1,73 @@
+# bot/csv_tail.py
+"""
+Reverse reader for append-only history CSVs.
+Seeks backwards from the end of the file in fixed-size blocks until it has
+seen the last N distinct timestamps, so the cost of reading recent history
+depends on N rather than on the size of the file. Works for both the wide
+Timestamp,<wallet>,... CSV (one row per timestamp) and the long balance log
+(one row per wallet per timestamp), as long as rows are appended in time order.
+"""
+import csv
+import os
+from typing import List, Tuple
+
+BLOCK_SIZE = 64 * 1024
+
+
+def read_header(csv_path: str) -> List[str]:
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return next(csv.reader([f.readline()]), [])
+
+
+def read_tail(csv_path: str, num_timestamps: int, block_size: int = BLOCK_SIZE) -> Tuple[List[str], List[List[str]]]:
+    """
+    Header plus every row belonging to the last `num_timestamps` distinct timestamps.
+
+    Args:
+        csv_path: History CSV whose first column is the timestamp
+        num_timestamps: Distinct timestamps to return
+        block_size: Bytes read per backward seek
+
+    Returns:
+        tuple: (header, rows in file order)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    header = read_header(csv_path)
+    if not header or num_timestamps <= 0:
+        return header, []
+
+    lines: List[bytes] = []
+    timestamps = set()
+    with open(csv_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        done = False
+        while position > 0 and not done:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step) + remainder
+            parts = chunk.split(b"\n")
+            # The first piece may be the tail end of a line that starts in the previous block
+            remainder = parts[0] if position > 0 else b""
+            complete = parts[1:] if position > 0 else parts
+            for line in reversed(complete):
+                if not line.strip():
+                    continue
+                timestamp = line.split(b",", 1)[0]
+                if timestamp not in timestamps:
+                    if len(timestamps) == num_timestamps:
+                        done = True
+                        break
+                    timestamps.add(timestamp)
+                lines.append(line)
+
+    # At the start of the file the last line collected is the header
+    if lines and position == 0 and next(csv.reader([lines[-1].decode('utf-8')]), []) == header:
+        lines.pop()
+    lines.reverse()
+    rows = list(csv.reader(line.decode('utf-8').rstrip("\r") for line in lines))
+    return header, rows
@@ -0,0 +1,58 @@
+# bot/downsample.py
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling for chart series.
+Keeps the first and last point and, for every bucket in between, the point
+forming the largest triangle with the previously kept point and the average
+of the next bucket. Spikes and dips survive, unlike plain decimation, while
+the number of points handed to matplotlib stays bounded.
+"""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps.
+
+    Args:
+        x: Monotonic x values (e.g. seconds)
+        y: Values, same length as x, without NaNs
+        threshold: Number of points to keep (at least 3 to have any effect)
+
+    Returns:
+        np.ndarray: Sorted indices into x/y; all of them if no reduction is needed
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # threshold - 2 buckets over the points between the fixed first and last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Bucket averages from prefix sums, all at once; the last bucket looks ahead to the final point
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = ends - starts
+    next_x = np.append(((cum_x[ends] - cum_x[starts]) / sizes)[1:], x[-1])
+    next_y = np.append(((cum_y[ends] - cum_y[starts]) / sizes)[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    # Each bucket depends on the point chosen in the one before it; the work inside is vectorized
+    for i in range(threshold - 2):
+        start, end = starts[i], ends[i]
+        ax, ay = x[previous], y[previous]
+        areas = np.abs((ax - next_x[i]) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y[i] - ay))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> tuple[np.ndarray, np.ndarray]:
+    """Downsampled (x, y); see lttb_indices."""
+    indices = lttb_indices(x, y, threshold)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
@@ -0,0 +1,187 @@
+# bot/event_dedup.py
+"""
+De-duplication of Slack events.
+Slack redelivers an event when the ack was slow or the socket reconnected,
+and each copy would otherwise run the command (and its balance fetches)
+again. Seen `event_id`s and `client_msg_id`s are remembered for
+EVENT_DEDUP_TTL seconds in a bounded, insertion-ordered map.
+
+With EVENT_DEDUP_FILE set, keys are also appended to a small log file
+(`<expiry> <key>` per line) that is reloaded on start, so replays after a
+restart are caught too. The file is locked while it is read and appended,
+so two listener processes sharing it (e.g. an old instance that has not
+exited yet) do not both answer the same event.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; file mode then only survives restarts
+    fcntl = None
+
+from bot.config import EVENT_DEDUP_TTL, EVENT_DEDUP_MAX_ENTRIES, EVENT_DEDUP_FILE
+
+
+def event_keys(payload: dict) -> List[str]:
+    """Identifiers of one events_api envelope payload; any of them repeating marks a redelivery."""
+    event = payload.get("event", {})
+    keys = []
+    if payload.get("event_id"):
+        keys.append(f"event:{payload['event_id']}")
+    if event.get("client_msg_id"):
+        keys.append(f"msg:{event['client_msg_id']}")
+    return keys
+
+
+class EventDeduplicator:
+    """Bounded, time-expiring set of seen event keys, optionally backed by a file."""
+
+    def __init__(self, ttl: float = EVENT_DEDUP_TTL, max_entries: int = EVENT_DEDUP_MAX_ENTRIES,
+                 path: Optional[str] = EVENT_DEDUP_FILE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.duplicates = 0
+        self._seen: "OrderedDict[str, float]" = OrderedDict()  # key -> expiry (epoch seconds)
+        self._lock = threading.Lock()
+        self._file = None
+        self._offset = 0
+        self._lines = 0
+        if path:
+            with self._lock:
+                self._open()
+                self._lock_file()
+                try:
+                    self._sync_from_file()
+                    self._compact()
+                finally:
+                    self._unlock_file()
+
+    def is_duplicate(self, keys: Iterable[str]) -> bool:
+        """
+        Check-and-remember: True if any key was seen within the TTL,
+        otherwise record all keys and return False.
+        """
+        keys = [key for key in keys if key]
+        if not keys:
+            return False
+        now = time.time()
+        with self._lock:
+            if not self.path:
+                return self._check(keys, now)
+            self._lock_file()
+            try:
+                self._sync_from_file()
+                return self._check(keys, now)
+            finally:
+                self._unlock_file()
+
+    def _check(self, keys: List[str], now: float) -> bool:
+        self._expire(now)
+        if any(self._seen.get(key, 0) > now for key in keys):
+            self.duplicates += 1
+            return True
+        expiry = now + self.ttl
+        for key in keys:
+            self._seen[key] = expiry
+            self._seen.move_to_end(key)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        if self._file is not None:
+            self._append(keys, expiry)
+        return False
+
+    def _expire(self, now: float):
+        while self._seen:
+            key, expiry = next(iter(self._seen.items()))
+            if expiry > now:
+                break
+            self._seen.popitem(last=False)
+
+    # --- File mode (caller holds self._lock and the file lock) ---
+
+    def _open(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, 'a+', encoding='utf-8')
+        self._offset = 0
+        self._lines = 0
+
+    def _lock_file(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            # Another process may have compacted (replaced) the file while we waited
+            if os.fstat(self._file.fileno()).st_ino != os.stat(self.path).st_ino:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                self._open()
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _sync_from_file(self):
+        """Merge keys appended since our last read (by us or another process)."""
+        now = time.time()
+        self._file.seek(self._offset)
+        for line in self._file:
+            if not line.endswith("\n"):
+                break  # partial write; picked up next time
+            self._offset += len(line.encode('utf-8'))
+            self._lines += 1
+            expiry, _, key = line.rstrip("\n").partition(" ")
+            try:
+                expiry = float(expiry)
+            except ValueError:
+                continue
+            if key and expiry > now and expiry > self._seen.get(key, 0):
+                self._seen[key] = expiry
+                self._seen.move_to_end(key)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+
+    def _append(self, keys: List[str], expiry: float):
+        data = "".join(f"{expiry:.3f} {key}\n" for key in keys)
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self._file.flush()
+        self._offset = self._file.tell()
+        self._lines += len(keys)
+        if self._lines > 2 * self.max_entries:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the file with only live keys (atomic replace)."""
+        self._expire(time.time())
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{expiry:.3f} {key}\n" for key, expiry in self._seen.items())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Keep holding the lock on the old inode until the new file is open
+        old_file = self._file
+        self._file = open(self.path, 'a+', encoding='utf-8')
+        self._file.seek(0, os.SEEK_END)
+        self._offset = self._file.tell()
+        self._lines = len(self._seen)
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            fcntl.flock(old_file.fileno(), fcntl.LOCK_UN)
+        old_file.close()
+
+
+_deduplicator = None
+_deduplicator_lock = threading.Lock()
+
+
+def get_event_deduplicator() -> EventDeduplicator:
+    global _deduplicator
+    with _deduplicator_lock:
+        if _deduplicator is None:
+            _deduplicator = EventDeduplicator()
+        return _deduplicator
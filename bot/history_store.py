@@ -0,0 +1,289 @@
+# bot/history_store.py
+"""
+Columnar balance history (optional, requires pyarrow).
+The long-format balance log stays the small hot append file; a background
+compactor periodically moves its rows into Parquet files partitioned by month
+(HISTORY_DIR/month=YYYY-MM/part-0.parquet) with typed columns:
+
+    timestamp  timestamp[us, UTC]
+    wallet     string (dictionary encoded)
+    address    string
+    balance    float64
+
+Readers load only the columns they ask for and only the month partitions that
+overlap the requested range, plus the hot file for the newest rows.
+
+Run one compaction by hand (while the listener is stopped):
+    python -m bot.history_store compact
+"""
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = pq = None
+    PYARROW_AVAILABLE = False
+
+from bot.config import BALANCE_LOG_FILE, GMT_OFFSET, HISTORY_DIR, HISTORY_COMPACT_INTERVAL
+
+COLUMNS = ["timestamp", "wallet", "address", "balance"]
+PART_FILE = "part-0.parquet"
+
+_compact_lock = threading.Lock()
+
+
+def columnar_available() -> bool:
+    if not PYARROW_AVAILABLE:
+        print("⚠️ pyarrow is not installed - columnar history disabled (pip install pyarrow)")
+    return PYARROW_AVAILABLE
+
+
+def _schema():
+    return pa.schema([
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("wallet", pa.dictionary(pa.int32(), pa.string())),
+        ("address", pa.string()),
+        ("balance", pa.float64()),
+    ])
+
+
+def _month_dir(month: str, history_dir: str = HISTORY_DIR) -> str:
+    return os.path.join(history_dir, f"month={month}")
+
+
+def list_months(history_dir: str = HISTORY_DIR) -> List[str]:
+    """Compacted months (YYYY-MM), oldest first."""
+    try:
+        names = os.listdir(history_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(name.split("=", 1)[1] for name in names
+                  if name.startswith("month=") and os.path.exists(os.path.join(history_dir, name, PART_FILE)))
+
+
+def _typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce raw CSV columns to the partition column types."""
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+    if "address" in df.columns:
+        df["address"] = df["address"].fillna("")
+    if "balance" in df.columns:
+        df["balance"] = pd.to_numeric(df["balance"], errors="coerce").astype("float64")
+        df = df.dropna(subset=["balance"])
+    return df
+
+
+def _read_hot_rows(path: str, columns: List[str]) -> pd.DataFrame:
+    """Requested columns of a hot (CSV) log file, typed like the partitions."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=columns)
+    df = pd.read_csv(path, usecols=columns, dtype={"wallet": str, "address": str})
+    return _typed_frame(df)
+
+
+def compact(log_path: str = BALANCE_LOG_FILE, history_dir: str = HISTORY_DIR) -> int:
+    """
+    Move rows from the hot balance log into the month partitions.
+
+    The live log is rotated to `<log>.compacting` first, so the writer keeps
+    appending to a fresh file; only the months present in the rotated rows
+    are rewritten (read, merge, de-duplicate, atomic replace). Rotation goes
+    through this process's writer, so compaction belongs to the process
+    that logs the history (the listener).
+
+    Returns:
+        int: Number of rows moved
+    """
+    if not columnar_available():
+        return 0
+
+    from bot.balance_log import get_balance_log
+
+    with _compact_lock:
+        pending_path = f"{log_path}.compacting"
+        # A leftover from an interrupted compaction is merged first
+        if not os.path.exists(pending_path):
+            if not get_balance_log(log_path).rotate(pending_path):
+                return 0
+
+        try:
+            rows = _read_hot_rows(pending_path, COLUMNS)
+        except pd.errors.EmptyDataError:
+            rows = pd.DataFrame(columns=COLUMNS)
+        if rows.empty:
+            os.remove(pending_path)
+            return 0
+        local = timezone(timedelta(hours=GMT_OFFSET))
+        months = rows["timestamp"].dt.tz_convert(local).dt.strftime("%Y-%m")
+        for month, month_rows in rows.groupby(months):
+            _merge_month(month, month_rows, history_dir)
+
+        os.remove(pending_path)
+        print(f"🗜️ Compacted {len(rows)} history rows into {months.nunique()} month partition(s)")
+        return len(rows)
+
+
+def _merge_month(month: str, new_rows: pd.DataFrame, history_dir: str):
+    directory = _month_dir(month, history_dir)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, PART_FILE)
+
+    if os.path.exists(path):
+        existing = pq.read_table(path).to_pandas()
+        existing["wallet"] = existing["wallet"].astype(str)
+        merged = pd.concat([existing, new_rows], ignore_index=True)
+    else:
+        merged = new_rows
+    merged = (merged.drop_duplicates(subset=["timestamp", "wallet"], keep="last")
+                    .sort_values(["timestamp", "wallet"], kind="stable"))
+
+    table = pa.Table.from_pandas(merged[COLUMNS], schema=_schema(), preserve_index=False)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def _month_of(ts: pd.Timestamp) -> str:
+    return ts.tz_convert(timezone(timedelta(hours=GMT_OFFSET))).strftime("%Y-%m")
+
+
+def read_history(columns: Optional[List[str]] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, wallets: Optional[List[str]] = None,
+                 log_path: str = BALANCE_LOG_FILE, history_dir: str = HISTORY_DIR) -> pd.DataFrame:
+    """
+    Long-format history from the partitions plus the hot log.
+
+    Args:
+        columns: Columns to load (timestamp is always included)
+        start: Inclusive lower bound (timezone-aware)
+        end: Inclusive upper bound (timezone-aware)
+        wallets: Restrict to these wallet names
+
+    Returns:
+        pd.DataFrame: Rows sorted by timestamp, timestamps in UTC
+    """
+    columns = ["timestamp"] + [c for c in (columns or COLUMNS) if c != "timestamp"]
+    load_columns = columns + (["wallet"] if wallets and "wallet" not in columns else [])
+
+    start_month = _month_of(pd.Timestamp(start)) if start is not None else None
+    end_month = _month_of(pd.Timestamp(end)) if end is not None else None
+    months = [m for m in list_months(history_dir)
+              if (start_month is None or m >= start_month) and (end_month is None or m <= end_month)]
+
+    filters = []
+    if start is not None:
+        filters.append(("timestamp", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("timestamp", "<=", pd.Timestamp(end)))
+    if wallets:
+        filters.append(("wallet", "in", list(wallets)))
+
+    frames = [_read_month(month, load_columns, filters or None, history_dir) for month in months]
+    frames += [_read_hot_rows(path, load_columns) for path in (f"{log_path}.compacting", log_path)]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True)
+
+    if start is not None:
+        df = df[df["timestamp"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["timestamp"] <= pd.Timestamp(end)]
+    if wallets:
+        df = df[df["wallet"].isin(wallets)]
+    return df.sort_values("timestamp", kind="stable")[columns].reset_index(drop=True)
+
+
+def read_recent_history(num_timestamps: int, columns: Optional[List[str]] = None,
+                        log_path: str = BALANCE_LOG_FILE, history_dir: str = HISTORY_DIR) -> pd.DataFrame:
+    """
+    Rows for the last `num_timestamps` distinct timestamps, reading the hot log
+    and then only as many month partitions (newest first) as needed.
+    """
+    columns = ["timestamp"] + [c for c in (columns or ["wallet", "balance"]) if c != "timestamp"]
+    frames = [_read_hot_rows(path, columns) for path in (log_path, f"{log_path}.compacting")]
+    frames = [f for f in frames if not f.empty]
+    seen = set().union(*(set(f["timestamp"]) for f in frames)) if frames else set()
+
+    for month in reversed(list_months(history_dir)):
+        if len(seen) >= num_timestamps:
+            break
+        frame = _read_month(month, columns, None, history_dir)
+        frames.append(frame)
+        seen.update(frame["timestamp"])
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True)
+    cutoff = sorted(seen)[-num_timestamps] if len(seen) > num_timestamps else None
+    if cutoff is not None:
+        df = df[df["timestamp"] >= cutoff]
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def _read_month(month: str, columns: List[str], filters, history_dir: str) -> pd.DataFrame:
+    path = os.path.join(_month_dir(month, history_dir), PART_FILE)
+    df = pq.read_table(path, columns=columns, filters=filters).to_pandas()
+    if "wallet" in df.columns:
+        df["wallet"] = df["wallet"].astype(str)
+    return df
+
+
+class HistoryCompactor(threading.Thread):
+    """Daemon thread that compacts the hot balance log every `interval` seconds."""
+
+    def __init__(self, interval: float = HISTORY_COMPACT_INTERVAL):
+        super().__init__(name="history-compactor", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        print(f"🗜️ History compactor started (interval {self.interval:g}s)")
+        while not self._stop_event.wait(self.interval):
+            try:
+                compact()
+            except Exception as e:
+                print(f"❌ History compaction failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_compactor = None
+
+
+def start_history_compactor(interval: float = HISTORY_COMPACT_INTERVAL) -> Optional[HistoryCompactor]:
+    """Start the process-wide compactor (no-op without pyarrow or if already running)."""
+    global _compactor
+    if not columnar_available():
+        return None
+    if _compactor is None or not _compactor.is_alive():
+        _compactor = HistoryCompactor(interval)
+        _compactor.start()
+    return _compactor
+
+
+def stop_history_compactor():
+    global _compactor
+    if _compactor is not None:
+        _compactor.stop()
+        _compactor = None
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "compact":
+        print("Usage: python -m bot.history_store compact")
+        return
+    rows = compact()
+    print(f"✅ Moved {rows} rows from {BALANCE_LOG_FILE} into {HISTORY_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
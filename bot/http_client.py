@@ -0,0 +1,128 @@
+# bot/http_client.py
+"""
+Shared HTTP client layer for upstream balance APIs.
+Provides a pooled keep-alive session and JSON requests with retry,
+jittered exponential backoff and Retry-After support.
+"""
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from bot.config import (
+    API_TIMEOUT, API_MAX_RETRIES, API_BACKOFF_BASE, API_BACKOFF_MAX, API_RETRY_AFTER_MAX,
+    API_RETRY_STATUSES, HTTP_POOL_SIZE, FETCH_DEADLINE,
+)
+from bot.rate_limiter import AdaptiveRateLimiter
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the shared HTTP session used for all upstream API calls.
+    The session keeps connections alive and pools them per host, so repeated
+    balance lookups skip the DNS lookup, TCP connect and TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # Retries are handled by api_request_json so Retry-After and jitter are under our control
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept": "application/json"})
+                _session = session
+    return _session
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * (2 ** attempt)))
+
+
+def api_request_json(method: str, url: str, params: dict | None = None, json_body: dict | None = None,
+                     headers: dict | None = None, max_retries: int = API_MAX_RETRIES,
+                     limiter: AdaptiveRateLimiter | None = None) -> dict:
+    """
+    Performs a request through the shared session and decodes the JSON body.
+    Timeouts, connection errors and retryable HTTP statuses are retried with
+    jittered exponential backoff. A Retry-After header, when present, is honored
+    as the minimum delay before the next attempt. When a rate limiter is given,
+    every attempt waits for a token and 429 responses slow the limiter down.
+
+    Args:
+        method (str): HTTP method ("GET" or "POST")
+        url (str): Endpoint URL
+        params (dict | None): Query string parameters
+        json_body (dict | None): JSON request body
+        headers (dict | None): Extra request headers
+        max_retries (int): Number of retries after the first attempt
+        limiter (AdaptiveRateLimiter | None): Rate limiter shared by all calls to this upstream
+
+    Returns:
+        dict: Decoded JSON response
+
+    Raises:
+        requests.exceptions.RequestException: If the request still fails after all retries
+        RateLimitTimeout: If the limiter had no free slot within FETCH_DEADLINE
+        ValueError: If the response body is not valid JSON
+    """
+    session = get_http_session()
+
+    for attempt in range(max_retries + 1):
+        last_attempt = attempt == max_retries
+        if limiter is not None:
+            limiter.acquire(timeout=FETCH_DEADLINE)
+        try:
+            resp = session.request(method, url, params=params, json=json_body, headers=headers,
+                                   timeout=API_TIMEOUT)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            if last_attempt:
+                raise
+            delay = _backoff_delay(attempt)
+            print(f"Retrying {url} in {delay:.2f}s after {type(e).__name__} (attempt {attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            continue
+
+        retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+        if limiter is not None:
+            if resp.status_code == 429:
+                limiter.on_throttled(retry_after)
+            elif resp.ok:
+                limiter.on_success()
+
+        if resp.status_code in API_RETRY_STATUSES and not last_attempt:
+            if retry_after is not None and retry_after > API_RETRY_AFTER_MAX:
+                # Upstream asked us to back off longer than any caller will wait
+                resp.raise_for_status()
+            delay = max(retry_after or 0.0, _backoff_delay(attempt))
+            print(f"Retrying {url} in {delay:.2f}s after HTTP {resp.status_code} (attempt {attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            continue
+
+        resp.raise_for_status()
+        return resp.json()
@@ -0,0 +1,127 @@
+# bot/rate_limiter.py
+"""
+Adaptive token-bucket rate limiter for upstream API calls.
+The refill rate grows slowly while requests succeed and is cut sharply when
+the upstream answers 429, pausing entirely for any Retry-After period.
+"""
+import threading
+import time
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request could not get a token within its wait budget."""
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with additive-increase / multiplicative-decrease rate control.
+
+    Every upstream request takes one token. Tokens refill at `rate` per second
+    up to `burst`. Each success raises the rate by roughly `increase_step`
+    requests/second per second of traffic; each 429 multiplies it by
+    `decrease_factor` and drains the bucket.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, min_rate: float, max_rate: float,
+                 increase_step: float, decrease_factor: float, log_interval: float):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.log_interval = log_interval
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = 0
+        self._last_log = 0.0
+        self._cond = threading.Condition()
+
+        self.throttled = 0
+
+    def acquire(self, timeout: float | None = None):
+        """
+        Block until a token is available.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Raises:
+            RateLimitTimeout: If no token became available within `timeout`
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        self._maybe_log(now)
+                        return
+
+                    delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise RateLimitTimeout(
+                                f"{self.name}: no request slot within {timeout:.1f}s "
+                                f"(rate={self.rate:.2f}/s, queue={self._waiting})")
+                        delay = min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                self._waiting -= 1
+
+    def on_success(self):
+        """Additive increase after a successful upstream response."""
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.increase_step / self.rate)
+
+    def on_throttled(self, retry_after: float | None = None):
+        """
+        Multiplicative decrease after a 429 response.
+
+        Args:
+            retry_after: Seconds the upstream asked us to wait, if given
+        """
+        with self._cond:
+            now = time.monotonic()
+            old_rate = self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = 0.0
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self._paused_until = max(self._paused_until, now + pause)
+            self.throttled += 1
+            print(f"🚦 {self.name} throttled (429): rate {old_rate:.2f}/s -> {self.rate:.2f}/s, "
+                  f"pausing {pause:.1f}s, queue={self._waiting}")
+            self._last_log = now
+
+    def status(self) -> dict:
+        """Current rate, tokens and queue depth for logging."""
+        with self._cond:
+            return {
+                "rate": self.rate,
+                "tokens": self._tokens,
+                "queue": self._waiting,
+                "throttled": self.throttled,
+            }
+
+    def _refill(self, now: float):
+        """Add tokens for the time elapsed since the last refill. Caller must hold the lock."""
+        if now < self._paused_until:
+            self._last_refill = now
+            return
+        elapsed = now - max(self._last_refill, self._paused_until)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def _maybe_log(self, now: float):
+        """Print the limiter state at most once per log interval. Caller must hold the lock."""
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            print(f"🚦 {self.name} limiter: rate={self.rate:.2f}/s, queue={self._waiting - 1}, "
+                  f"throttled={self.throttled}")
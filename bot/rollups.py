@@ -0,0 +1,226 @@
+# bot/rollups.py
+"""
+Incremental hourly/daily rollups of balance history.
+Every logged snapshot upserts open/high/low/close/count rows per wallet and
+per company (sum of its wallets) into a small SQLite table, so long-range
+charts and queries read one row per bucket instead of every raw sample.
+Buckets are aligned to GMT+7 and keyed by their ISO start time.
+
+Backfill from existing history (balance log or wide CSV):
+    python -m bot.rollups rebuild [history.csv ...]
+"""
+import os
+import sqlite3
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot.config import ROLLUP_DB_FILE, GMT_OFFSET, BALANCE_LOG_FILE, CSV_FILE, HISTORY_COLUMNAR_ENABLED
+
+RESOLUTIONS = ("hour", "day")
+WALLET = "wallet"
+COMPANY = "company"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS balance_rollups (
+    scope      TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket     TEXT NOT NULL,
+    open       REAL NOT NULL,
+    high       REAL NOT NULL,
+    low        REAL NOT NULL,
+    close      REAL NOT NULL,
+    count      INTEGER NOT NULL,
+    first_ts   TEXT NOT NULL,
+    last_ts    TEXT NOT NULL,
+    PRIMARY KEY (scope, resolution, name, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rollups_bucket ON balance_rollups (scope, resolution, bucket);
+"""
+
+# Merge a new sample (or pre-aggregated bucket) into an existing bucket.
+# Open/close follow the earliest/latest sample time, so late or replayed rows stay correct.
+UPSERT = """
+INSERT INTO balance_rollups (scope, name, resolution, bucket, open, high, low, close, count, first_ts, last_ts)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (scope, resolution, name, bucket) DO UPDATE SET
+    open     = CASE WHEN excluded.first_ts < first_ts THEN excluded.open ELSE open END,
+    close    = CASE WHEN excluded.last_ts >= last_ts THEN excluded.close ELSE close END,
+    high     = MAX(high, excluded.high),
+    low      = MIN(low, excluded.low),
+    count    = count + excluded.count,
+    first_ts = MIN(first_ts, excluded.first_ts),
+    last_ts  = MAX(last_ts, excluded.last_ts)
+"""
+
+_LOCAL_TZ = timezone(timedelta(hours=GMT_OFFSET))
+_local = threading.local()
+
+
+def _connection(db_path: str) -> sqlite3.Connection:
+    """Per-thread connection to the rollup database (WAL, rollups schema only)."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> str:
+    """ISO start of the GMT+7 hour or day containing `timestamp`."""
+    local = timestamp.astimezone(_LOCAL_TZ)
+    if resolution == "hour":
+        start = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.isoformat()
+
+
+def record_snapshot(timestamp_str: str, balances: Dict[str, Decimal], companies: Dict[str, str],
+                    expected: Optional[Dict[str, List[str]]] = None, db_path: str = ROLLUP_DB_FILE) -> int:
+    """
+    Fold one snapshot into the hourly and daily rollups.
+
+    Args:
+        timestamp_str: ISO timestamp of the snapshot
+        balances: Wallet name to balance (wallets that failed are left out)
+        companies: Wallet name to company
+        expected: Company to all of its wallet names; a company total is only
+            recorded when every one of them has a balance in this snapshot
+
+    Returns:
+        int: Number of rollup rows touched
+    """
+    samples = [(WALLET, name, float(balance)) for name, balance in balances.items() if balance is not None]
+
+    totals: Dict[str, float] = defaultdict(float)
+    for name, balance in balances.items():
+        if balance is not None:
+            totals[companies.get(name, "Unknown")] += float(balance)
+    for company, total in totals.items():
+        members = (expected or {}).get(company)
+        if members and any(balances.get(member) is None for member in members):
+            continue  # a partial company total would show up as a fake dip
+        samples.append((COMPANY, company, total))
+
+    return _upsert_samples([(timestamp_str, scope, name, value) for scope, name, value in samples], db_path)
+
+
+def _upsert_samples(samples: Iterable[Tuple[str, str, str, float]], db_path: str) -> int:
+    rows = []
+    for timestamp_str, scope, name, value in samples:
+        timestamp = datetime.fromisoformat(timestamp_str)
+        for resolution in RESOLUTIONS:
+            bucket = bucket_start(timestamp, resolution)
+            rows.append((scope, name, resolution, bucket, value, value, value, value, 1,
+                         timestamp_str, timestamp_str))
+    if not rows:
+        return 0
+    conn = _connection(db_path)
+    with conn:
+        conn.executemany(UPSERT, rows)
+    return len(rows)
+
+
+def query_rollups(scope: str = WALLET, resolution: str = "hour", names: Optional[List[str]] = None,
+                  start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  limit: Optional[int] = None, db_path: str = ROLLUP_DB_FILE) -> List[tuple]:
+    """
+    Rollup rows, oldest bucket first.
+
+    Args:
+        scope: "wallet" or "company"
+        resolution: "hour" or "day"
+        names: Restrict to these wallet or company names
+        start: Include buckets starting at or after this time
+        end: Include buckets starting at or before this time
+        limit: Keep only the newest `limit` buckets
+
+    Returns:
+        list: (name, bucket, open, high, low, close, count) tuples
+    """
+    clauses, params = ["scope = ?", "resolution = ?"], [scope, resolution]
+    if start is not None:
+        clauses.append("bucket >= ?")
+        params.append(bucket_start(start, resolution))
+    if end is not None:
+        clauses.append("bucket <= ?")
+        params.append(bucket_start(end, resolution))
+    if names:
+        clauses.append(f"name IN ({', '.join('?' * len(names))})")
+        params.extend(names)
+    where = " AND ".join(clauses)
+    if limit is not None:
+        # Newest `limit` distinct buckets, then every row inside them
+        where += (f" AND bucket >= (SELECT MIN(bucket) FROM (SELECT DISTINCT bucket FROM balance_rollups"
+                  f" WHERE {where} ORDER BY bucket DESC LIMIT ?))")
+        params = params + params + [limit]
+    return _connection(db_path).execute(
+        f"SELECT name, bucket, open, high, low, close, count FROM balance_rollups WHERE {where} "
+        f"ORDER BY bucket, name", params
+    ).fetchall()
+
+
+def rebuild(csv_paths: Iterable[str] = (CSV_FILE, BALANCE_LOG_FILE), db_path: str = ROLLUP_DB_FILE) -> int:
+    """
+    Recompute all rollups from raw history (one-off backfill): the given CSV
+    files plus the Parquet partitions when columnar history is enabled.
+    Rows present in more than one source are counted once.
+    Company membership comes from the current wallet list.
+
+    Returns:
+        int: Number of raw samples folded in
+    """
+    from bot.balance_log import read_history_rows
+    from bot.wallet_registry import get_wallet_registry
+
+    wallet_data = get_wallet_registry().snapshot()
+    companies = {name: info.get("company", "Unknown") for name, info in wallet_data.items()}
+    expected: Dict[str, List[str]] = defaultdict(list)
+    for name, company in companies.items():
+        expected[company].append(name)
+
+    conn = _connection(db_path)
+    with conn:
+        conn.execute("DELETE FROM balance_rollups")
+
+    snapshots: Dict[datetime, Dict[str, Decimal]] = defaultdict(dict)
+    for path in csv_paths:
+        if os.path.exists(path):
+            for timestamp_str, wallet, balance in read_history_rows(path):
+                snapshots[datetime.fromisoformat(timestamp_str)][wallet] = Decimal(balance)
+
+    if HISTORY_COLUMNAR_ENABLED:
+        from bot import history_store
+        if history_store.columnar_available():
+            frame = history_store.read_history(columns=["wallet", "balance"])
+            for timestamp, wallet, balance in frame.itertuples(index=False):
+                snapshots[timestamp.to_pydatetime()][wallet] = Decimal(str(balance))
+
+    for timestamp in sorted(snapshots):
+        record_snapshot(timestamp.astimezone(_LOCAL_TZ).isoformat(), snapshots[timestamp],
+                        companies, expected, db_path)
+    return sum(len(balances) for balances in snapshots.values())
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python -m bot.rollups rebuild [history.csv ...]")
+        return
+    paths = sys.argv[2:] or [CSV_FILE, BALANCE_LOG_FILE]
+    samples = rebuild(paths)
+    print(f"✅ Rebuilt rollups from {samples} samples into {ROLLUP_DB_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bot/singleflight.py
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one in-flight call
+instead of each hitting the upstream API.
+"""
+import threading
+from typing import Any, Callable
+
+
+class _Call:
+    """One in-flight call and the result every waiter will receive."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls by key.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running block until it finishes and receive the same result (or the
+    same exception). Once the call completes the key is forgotten, so the next
+    caller triggers a fresh call.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run `fn` for `key`, or wait for the call already in flight.
+
+        Args:
+            key: Coalescing key (e.g. a wallet address)
+            fn: Zero-argument function performing the real work
+
+        Returns:
+            Any: The result of the shared call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched."""
+        with self._lock:
+            return len(self._calls)
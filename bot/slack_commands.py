@@ -3,14 +3,21 @@
 Slack command handlers for wallet management.
 Handles parsing and validation of slash commands.
 """
+import asyncio
+import csv
 import re
-from typing import Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 
-from bot.config import GMT_OFFSET
-from bot.wallet_manager import add_wallet, remove_wallet, list_wallets, load_wallets, validate_trc20_address
-from bot.usdt_checker import get_usdt_trc20_balance
+from bot.config import GMT_OFFSET, IMPORT_MAX_ROWS, NUM_RECORDS_TO_PLOT, CHART_MAX_RECORDS
+from bot.wallet_manager import add_wallet, remove_wallet, list_wallets, import_wallets, validate_trc20_address
+from bot.wallet_registry import get_wallet_registry
+from bot.balance_cache import BalanceReading
+from bot.usdt_checker import fetch_balances, fetch_balances_async, degraded_notice
+from bot.balance_poller import get_active_poller
+from bot.check_progress import CheckProgress, ProgressPublisher, format_reading_line, publish_progress_async
+from bot.chart_renderer import render_chart
 
 
 def parse_quoted_arguments(text: str) -> Tuple[bool, list]:
@@ -84,6 +91,65 @@ Use `!check` to see current balance."""
         return message
 
 
+def parse_import_rows(text: str) -> List[Tuple[int, str, str, str]]:
+    """
+    Parse pasted or uploaded CSV text into wallet rows.
+    Accepts `company,wallet,address` per line, with or without quotes,
+    an optional header line and Slack code fences.
+    
+    Args:
+        text: Raw CSV text
+        
+    Returns:
+        List[Tuple[int, str, str, str]]: (row_number, company, wallet, address);
+            rows with the wrong number of fields come back with empty fields
+    """
+    lines = [line.strip() for line in text.strip().strip('`').splitlines()]
+    rows = []
+    row_no = 0
+    for fields in csv.reader(line for line in lines if line):
+        fields = [field.strip().strip('"').strip() for field in fields]
+        if row_no == 0 and [field.lower() for field in fields] == ["company", "wallet", "address"]:
+            continue
+        row_no += 1
+        if len(fields) != 3:
+            rows.append((row_no, "", fields[1] if len(fields) > 1 else "", ""))
+            continue
+        rows.append((row_no, *fields))
+    return rows
+
+
+def handle_import_command(text: str) -> str:
+    """
+    Handle !import command (bulk add from pasted or uploaded CSV).
+    
+    Args:
+        text: CSV rows of company,wallet,address
+        
+    Returns:
+        str: Response message with one result line per row
+    """
+    usage = """**Usage:** `!import` followed by one `company,wallet,address` row per line, or attach a CSV file
+**Example:**
+    !import
+    KZP,KZP WDB2,TEhmKXCPgX64yjQ3t9skuSyUQBxwaWY4KS
+    KZP,KZP WDB3,TNZkbytSMdaRJ79CYzv8BGK6LWNmQxcuM8"""
+    
+    rows = parse_import_rows(text) if text else []
+    if not rows:
+        return f"❌ No wallet rows found\n\n{usage}"
+    if len(rows) > IMPORT_MAX_ROWS:
+        return f"❌ Too many rows ({len(rows)}). Import at most {IMPORT_MAX_ROWS} wallets at a time."
+    
+    added, results = import_wallets(rows)
+    failed = len(rows) - added
+    
+    summary = f"📊 **Imported:** {added} of {len(rows)} wallet(s)"
+    if failed:
+        summary += f"\n⚠️ **Note:** {failed} row(s) skipped"
+    return "\n".join(results) + f"\n\n{summary}"
+
+
 def handle_remove_command(text: str) -> str:
     """
     Handle !remove command.
@@ -119,9 +185,9 @@ def handle_remove_command(text: str) -> str:
     return message
 
 
-def handle_check_command(text: str) -> str:
+def resolve_check_targets(text: str) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
     """
-    Handle !check command.
+    Resolve !check arguments to the wallets to check.
     Accepts wallet names OR addresses for maximum user convenience.
     Robust parsing that handles bold text, markdown, and various quote formats.
     
@@ -129,17 +195,18 @@ def handle_check_command(text: str) -> str:
         text: Command arguments from Slack (optional wallet names/addresses)
         
     Returns:
-        str: Response message
+        Tuple: ({display_name: address}, None) or (None, error message)
     """
-    # Load all wallets
-    wallet_data = load_wallets()
+    # Load all wallets (indexed registry, re-parsed only when the file changes)
+    registry = get_wallet_registry()
+    wallet_data = registry.snapshot()
     if not wallet_data:
-        return "❌ No wallets configured"
+        return None, "❌ No wallets configured"
     
     # Parse inputs from text (if any)
     if not text or not text.strip():
         # Check all wallets
-        wallets_to_check = {name: info['address'] for name, info in wallet_data.items()}
+        wallets_to_check = registry.addresses()
     else:
         # Clean the text first - remove markdown formatting
         cleaned_text = text.strip()
@@ -164,7 +231,7 @@ def handle_check_command(text: str) -> str:
         
         # If no quoted inputs found, return error - NO FALLBACK
         if not inputs:
-            return f"""❌ No valid wallet names or addresses found in: `{text}`
+            return None, f"""❌ No valid wallet names or addresses found in: `{text}`
 
 **Usage:**
 • `!check` - Check all wallets
@@ -191,58 +258,158 @@ def handle_check_command(text: str) -> str:
             # Check if input is a TRC20 address
             if validate_trc20_address(input_str):
                 # It's an address - find the wallet name or use address as display
-                found_wallet = False
-                for wallet_name, wallet_info in wallet_data.items():
-                    if wallet_info['address'] == input_str:
-                        wallets_to_check[wallet_name] = input_str
-                        found_wallet = True
-                        break
-                
-                if not found_wallet:
+                wallet_name = registry.find_by_address(input_str)
+                if wallet_name is not None:
+                    wallets_to_check[wallet_name] = input_str
+                else:
                     # Address not in our monitored list - still check it
                     display_name = f"External: {input_str[:10]}...{input_str[-6:]}"
                     wallets_to_check[display_name] = input_str
             
             else:
                 # It's a wallet name - find the address (case-insensitive matching)
-                found_wallet = False
-                for wallet_name, wallet_info in wallet_data.items():
-                    if wallet_name.lower() == input_str.lower():
-                        wallets_to_check[wallet_name] = wallet_info['address']
-                        found_wallet = True
-                        break
-                
-                if not found_wallet:
+                wallet_name = registry.find_by_name(input_str)
+                if wallet_name is not None:
+                    wallets_to_check[wallet_name] = wallet_data[wallet_name]['address']
+                else:
                     not_found.append(input_str)
         
         # Report any wallet names not found
         if not_found:
-            return f"""❌ Wallet name(s) not found: {', '.join(not_found)}
+            return None, f"""❌ Wallet name(s) not found: {', '.join(not_found)}
 
 **Available wallet names:**
 {', '.join(list(wallet_data.keys())[:5])}{'...' if len(wallet_data) > 5 else ''}
 
 Use `!list` to see all wallets or provide TRC20 addresses directly."""
     
-    # Fetch balances
+    return wallets_to_check, None
+
+
+def split_check_snapshot(wallets_to_check: Dict[str, str]) -> Tuple[Dict[str, BalanceReading], Dict[str, str]]:
+    """
+    Monitored wallets come from the background poller's snapshot when it is running;
+    anything else (external addresses, wallets not polled yet) has to be fetched live.
+    
+    Returns:
+        Tuple: (readings served from the snapshot, {display_name: address} to fetch)
+    """
+    poller = get_active_poller()
+    if poller is not None:
+        return poller.split_snapshot(wallets_to_check)
+    return {}, wallets_to_check
+
+
+def handle_check_command(text: str) -> str:
+    """
+    Handle !check command.
+    
+    Args:
+        text: Command arguments from Slack (optional wallet names/addresses)
+        
+    Returns:
+        str: Response message
+    """
+    wallets_to_check, error = resolve_check_targets(text)
+    if error:
+        return error
+    
+    snapshot, to_fetch = split_check_snapshot(wallets_to_check)
+    fetched = fetch_balances(to_fetch)
+    readings = {name: snapshot.get(name) or fetched[name] for name in wallets_to_check}
+    return format_check_response(wallets_to_check, readings)
+
+
+def handle_check_command_progressive(text: str, publish: Callable[[str], None]) -> str:
+    """
+    Handle !check while streaming partial results.
+    `publish(partial_text)` is called (throttled) as balances arrive, e.g. to
+    edit a placeholder message; the returned final reply replaces it.
+    
+    Args:
+        text: Command arguments from Slack (optional wallet names/addresses)
+        publish: Receives the partial reply text
+        
+    Returns:
+        str: Response message
+    """
+    wallets_to_check, error = resolve_check_targets(text)
+    if error:
+        return error
+    
+    snapshot, to_fetch = split_check_snapshot(wallets_to_check)
+    if not to_fetch:
+        # Everything came from the poller snapshot - nothing to stream
+        return format_check_response(wallets_to_check, snapshot)
+    
+    progress = CheckProgress(wallets_to_check, snapshot)
+    publisher = ProgressPublisher(progress, publish)
+    publisher.start()
+    try:
+        fetched = fetch_balances(to_fetch, on_result=progress.record)
+    finally:
+        publisher.stop()
+    readings = {name: snapshot.get(name) or fetched[name] for name in wallets_to_check}
+    return format_check_response(wallets_to_check, readings)
+
+
+async def handle_check_command_progressive_async(text: str, publish: Callable) -> str:
+    """
+    Asyncio counterpart of handle_check_command_progressive; `publish` is a coroutine function.
+    
+    Args:
+        text: Command arguments from Slack (optional wallet names/addresses)
+        publish: Awaited with the partial reply text
+        
+    Returns:
+        str: Response message
+    """
+    # Both refresh the wallet registry (file lock + JSON parse, or SQLite); keep that off the loop
+    wallets_to_check, error = await asyncio.to_thread(resolve_check_targets, text)
+    if error:
+        return error
+    
+    snapshot, to_fetch = await asyncio.to_thread(split_check_snapshot, wallets_to_check)
+    if not to_fetch:
+        return format_check_response(wallets_to_check, snapshot)
+    
+    progress = CheckProgress(wallets_to_check, snapshot)
+    publisher = asyncio.create_task(publish_progress_async(progress, publish))
+    try:
+        fetched = await fetch_balances_async(to_fetch, on_result=progress.record)
+    finally:
+        publisher.cancel()
+        await asyncio.gather(publisher, return_exceptions=True)
+    readings = {name: snapshot.get(name) or fetched[name] for name in wallets_to_check}
+    return format_check_response(wallets_to_check, readings)
+
+
+def format_check_response(wallets_to_check: Dict[str, str], readings: Dict[str, BalanceReading]) -> str:
+    """
+    Build the !check reply from the readings of every requested wallet.
+    
+    Args:
+        wallets_to_check: {display_name: address} in display order
+        readings: BalanceReading per display name
+        
+    Returns:
+        str: Response message
+    """
     results = []
     total_balance = Decimal('0')
     successful_checks = 0
     
-    for display_name, address in wallets_to_check.items():
-        try:
-            balance = get_usdt_trc20_balance(address)
-            if balance is not None:
-                results.append(f"• **{display_name}**: {balance:,.2f} USDT")
-                total_balance += balance
-                successful_checks += 1
-            else:
-                results.append(f"• **{display_name}**: ❌ Unable to fetch balance")
-        except Exception as e:
-            results.append(f"• **{display_name}**: ❌ Error: {str(e)[:50]}...")
+    for display_name, reading in readings.items():
+        results.append(format_reading_line(display_name, reading))
+        if reading.balance is not None:
+            total_balance += reading.balance
+            successful_checks += 1
     
     # Handle no successful checks
     if successful_checks == 0:
+        notice = degraded_notice(readings)
+        if notice:
+            return f"❌ Unable to fetch any wallet balances.\n{notice}"
         return "❌ Unable to fetch any wallet balances. Please check your network connection."
     
     # Build response message
@@ -265,8 +432,77 @@ Use `!list` to see all wallets or provide TRC20 addresses directly."""
         wallet_list = "\n".join(results)
         message = f"{time_line}\n\n{wallet_list}{footer}"
     
+    notice = degraded_notice(readings)
+    if notice:
+        message += f"\n{notice}"
+    
     return message
 
+def handle_chart_command(text: str) -> Tuple[str, Optional[str]]:
+    """
+    Handle !chart command.
+    Renders the balance trend chart off-thread; the caller uploads the image.
+    
+    Args:
+        text: Optional quoted wallet names, `hour`/`day` resolution, a window
+            size (number of snapshots or buckets) and `full` for a full-resolution image
+        
+    Returns:
+        Tuple[str, Optional[str]]: (message, image path or None on failure)
+    """
+    usage = f"""**Usage:**
+• `!chart` - Trend of all wallets
+• `!chart "wallet1" "wallet2"` - Specific wallets
+• `!chart day` / `!chart hour "wallet"` - Daily or hourly closing balances
+• `!chart 2000` - Last 2000 snapshots (default {NUM_RECORDS_TO_PLOT})
+• `!chart full` - Full-resolution image instead of a quick preview"""
+    
+    cleaned_text = re.sub(r'[*`]', '', text or "").strip()
+    names = [name.strip() for name in re.findall(r'"([^"]*)"', cleaned_text) if name.strip()]
+    keywords = re.sub(r'"[^"]*"', ' ', cleaned_text).lower().split()
+    
+    resolution = None
+    num_records = NUM_RECORDS_TO_PLOT
+    full = False
+    for keyword in keywords:
+        if keyword in ("hour", "hourly"):
+            resolution = "hour"
+        elif keyword in ("day", "daily"):
+            resolution = "day"
+        elif keyword == "full":
+            full = True
+        elif keyword.isdigit() and 0 < int(keyword) <= CHART_MAX_RECORDS:
+            num_records = int(keyword)
+        elif keyword.isdigit():
+            return f"❌ Chart window must be between 1 and {CHART_MAX_RECORDS:,} records", None
+        else:
+            return f"❌ Unknown chart option: `{keyword}`\n\n{usage}", None
+    
+    wallets = None
+    if names:
+        registry = get_wallet_registry()
+        wallets, not_found = [], []
+        for name in names:
+            wallet_name = registry.find_by_name(name)
+            if wallet_name is not None:
+                wallets.append(wallet_name)
+            else:
+                not_found.append(name)
+        if not_found:
+            return f"""❌ Wallet name(s) not found: {', '.join(not_found)}
+
+Use `!list` to see all wallets.""", None
+    
+    success, result = render_chart(wallets, resolution, num_records, full)
+    if not success:
+        return result, None
+    
+    scope = ", ".join(wallets) if wallets else "all wallets"
+    period = {"hour": "hourly closes", "day": "daily closes"}.get(resolution, "snapshots")
+    quality = "full resolution" if full else "preview, add `full` for high resolution"
+    return f"📈 **Balance trend:** {scope} (last {num_records:,} {period}, {quality})", result
+
+
 def handle_list_command() -> str:
     """
     Handle !list command.
@@ -287,19 +523,24 @@ def handle_help_command() -> str:
     """
     return """**Wallet Management:**
 • `!add "company" "wallet" "address"` - Add new wallet
+• `!import` + `company,wallet,address` rows or a CSV file - Add many wallets
 • `!remove "wallet_name"` - Remove wallet  
 • `!list` - List all wallets
 • `!check` - Check all wallet balances
 • `!check "wallet_name"` - Check specific wallet balance
 • `!check "wallet1" "wallet2"` - Check multiple specific wallets
+• `!chart` - Balance trend chart (add wallet names, `hour`/`day`, a record count or `full`)
 
 **Examples:**
     !add "KZP" "WDB2" "TEhmKXCPgX64yjQ3t9skuSyUQBxwaWY4KS"
+    !import
+    KZP,KZP WDB3,TNZkbytSMdaRJ79CYzv8BGK6LWNmQxcuM8
     !remove "KZP WDB2"
     !list
     !check
     !check "KZP 96G1"
     !check "KZP 96G1" "KZP WDB2"
+    !chart day "KZP 96G1"
 
 **Notes:**
 • All arguments must be in quotes
@@ -326,10 +567,15 @@ def handle_slack_command(command: str, text: str, user_id: str, channel_id: str)
     # Route to appropriate handler
     if command == "!add":
         return handle_add_command(text)
+    elif command == "!import":
+        return handle_import_command(text)
     elif command == "!remove":
         return handle_remove_command(text)
     elif command == "!check":
         return handle_check_command(text)
+    elif command == "!chart":
+        message, _ = handle_chart_command(text)
+        return message
     elif command == "!list":
         return handle_list_command()
     elif command == "!help":
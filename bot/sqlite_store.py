@@ -0,0 +1,241 @@
+# bot/sqlite_store.py
+"""
+Optional SQLite storage backend for wallets and balance history.
+Enabled with STORAGE_BACKEND=sqlite. Uses WAL mode so the listener and cron
+jobs can read while another process writes, batches history inserts in one
+transaction, and indexes history by wallet and timestamp for range queries.
+
+One-shot migration from the JSON/CSV files:
+    python -m bot.sqlite_store migrate
+"""
+import os
+import sqlite3
+import sys
+import threading
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot.config import SQLITE_DB_FILE, WALLETS_FILE, CSV_FILE, BALANCE_LOG_FILE
+from bot.wallet_store import WalletConflictError
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallets (
+    key      TEXT PRIMARY KEY,
+    company  TEXT NOT NULL,
+    wallet   TEXT NOT NULL,
+    address  TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_wallets_company ON wallets (company);
+
+CREATE TABLE IF NOT EXISTS balance_history (
+    timestamp TEXT NOT NULL,
+    wallet    TEXT NOT NULL,
+    balance   TEXT NOT NULL,
+    PRIMARY KEY (wallet, timestamp)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON balance_history (timestamp);
+"""
+
+_local = threading.local()
+
+
+def get_connection(db_path: str = SQLITE_DB_FILE) -> sqlite3.Connection:
+    """Per-thread connection with WAL enabled and the schema in place."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def store_signature(db_path: str = SQLITE_DB_FILE) -> Optional[tuple]:
+    """Change marker for the database: (mtime, size) of the db file and its WAL."""
+    try:
+        db = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    try:
+        wal = os.stat(f"{db_path}-wal")
+        wal_sig = (wal.st_mtime_ns, wal.st_size)
+    except FileNotFoundError:
+        wal_sig = None
+    return (db.st_mtime_ns, db.st_size, wal_sig)
+
+
+# --- Wallets ---
+
+def load_wallets(db_path: str = SQLITE_DB_FILE) -> Dict[str, Dict[str, str]]:
+    """All wallets in insertion order, in the same shape as wallets.json."""
+    rows = get_connection(db_path).execute(
+        "SELECT key, company, wallet, address FROM wallets ORDER BY position"
+    ).fetchall()
+    return {key: {"company": company, "wallet": wallet, "address": address}
+            for key, company, wallet, address in rows}
+
+
+def add_wallet(key: str, info: Dict[str, str], db_path: str = SQLITE_DB_FILE):
+    """
+    Insert one wallet; the table constraints reject a duplicate key or address.
+
+    Raises:
+        WalletConflictError: If the key or address is already stored
+    """
+    conn = get_connection(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO wallets (key, company, wallet, address, position) "
+                "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(position), 0) + 1 FROM wallets))",
+                (key, info.get("company", "Unknown"), info.get("wallet", key), info["address"]),
+            )
+    except sqlite3.IntegrityError as e:
+        if "wallets.address" in str(e):
+            row = conn.execute("SELECT key FROM wallets WHERE address = ?", (info["address"],)).fetchone()
+            raise WalletConflictError(f"Address already used by '{row[0] if row else '?'}'")
+        raise WalletConflictError(f"Wallet '{key}' already exists")
+
+
+def remove_wallet(key: str, db_path: str = SQLITE_DB_FILE):
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute("DELETE FROM wallets WHERE key = ?", (key,))
+
+
+def replace_wallets(wallet_data: Dict[str, Dict[str, str]], db_path: str = SQLITE_DB_FILE):
+    """Replace the whole wallet table in one transaction."""
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute("DELETE FROM wallets")
+        conn.executemany(
+            "INSERT INTO wallets (key, company, wallet, address, position) VALUES (?, ?, ?, ?, ?)",
+            [(key, info.get("company", "Unknown"), info.get("wallet", key), info["address"], position)
+             for position, (key, info) in enumerate(wallet_data.items(), 1)],
+        )
+
+
+# --- Balance history ---
+
+def log_balances(timestamp: str, balances: Dict[str, Decimal], db_path: str = SQLITE_DB_FILE) -> int:
+    """
+    Insert one snapshot of balances in a single transaction.
+
+    Returns:
+        int: Number of rows written
+    """
+    return insert_history(((timestamp, wallet, balance) for wallet, balance in balances.items()), db_path)
+
+
+def insert_history(rows: Iterable[Tuple[str, str, Decimal]], db_path: str = SQLITE_DB_FILE,
+                   batch_size: int = 5000) -> int:
+    """Batched INSERT OR REPLACE of (timestamp, wallet, balance) rows."""
+    conn = get_connection(db_path)
+    written = 0
+    batch = []
+    with conn:
+        for timestamp, wallet, balance in rows:
+            batch.append((timestamp, wallet, str(balance)))
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT OR REPLACE INTO balance_history VALUES (?, ?, ?)", batch)
+                written += len(batch)
+                batch.clear()
+        if batch:
+            conn.executemany("INSERT OR REPLACE INTO balance_history VALUES (?, ?, ?)", batch)
+            written += len(batch)
+    return written
+
+
+def query_history(start: Optional[str] = None, end: Optional[str] = None,
+                  wallets: Optional[List[str]] = None,
+                  db_path: str = SQLITE_DB_FILE) -> List[Tuple[str, str, Decimal]]:
+    """
+    Balance history rows in a time range, oldest first.
+
+    Args:
+        start: Inclusive ISO timestamp lower bound
+        end: Inclusive ISO timestamp upper bound
+        wallets: Restrict to these wallet keys
+
+    Returns:
+        list: (timestamp, wallet, balance) tuples
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("timestamp <= ?")
+        params.append(end)
+    if wallets:
+        clauses.append(f"wallet IN ({', '.join('?' * len(wallets))})")
+        params.extend(wallets)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = get_connection(db_path).execute(
+        f"SELECT timestamp, wallet, balance FROM balance_history {where} ORDER BY timestamp", params
+    ).fetchall()
+    return [(timestamp, wallet, Decimal(balance)) for timestamp, wallet, balance in rows]
+
+
+def query_recent_history(num_timestamps: int,
+                         db_path: str = SQLITE_DB_FILE) -> List[Tuple[str, str, Decimal]]:
+    """History rows for the most recent `num_timestamps` distinct timestamps, oldest first."""
+    rows = get_connection(db_path).execute(
+        """
+        SELECT timestamp, wallet, balance FROM balance_history
+        WHERE timestamp >= (
+            SELECT MIN(timestamp) FROM (
+                SELECT DISTINCT timestamp FROM balance_history ORDER BY timestamp DESC LIMIT ?
+            )
+        )
+        ORDER BY timestamp
+        """,
+        (num_timestamps,),
+    ).fetchall()
+    return [(timestamp, wallet, Decimal(balance)) for timestamp, wallet, balance in rows]
+
+
+# --- Migration ---
+
+def migrate_from_files(wallets_path: str = WALLETS_FILE, csv_paths: Tuple[str, ...] = (CSV_FILE, BALANCE_LOG_FILE),
+                       db_path: str = SQLITE_DB_FILE) -> Tuple[int, int]:
+    """
+    Copy wallets.json and the wide and/or long history CSVs into the database.
+    Safe to re-run: wallets are replaced and history rows are upserted.
+
+    Returns:
+        tuple: (wallets migrated, history rows migrated)
+    """
+    from bot.balance_log import read_history_rows
+    from bot.wallet_store import read_wallets
+
+    wallet_count = 0
+    if os.path.exists(wallets_path):
+        wallet_data = read_wallets(wallets_path)
+        replace_wallets(wallet_data, db_path)
+        wallet_count = len(wallet_data)
+
+    history_count = 0
+    for csv_path in csv_paths:
+        if os.path.exists(csv_path):
+            history_count += insert_history(read_history_rows(csv_path), db_path)
+
+    return wallet_count, history_count
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python -m bot.sqlite_store migrate")
+        return
+    wallets, rows = migrate_from_files()
+    print(f"✅ Migrated {wallets} wallets and {rows} history rows into {SQLITE_DB_FILE}")
+    print("   Set STORAGE_BACKEND=sqlite to use the database")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# bot/transfer_tracker.py
+"""
+Incremental USDT balance tracking from TRC20 Transfer events.
+Instead of re-reading every balance on each poll, the tracker pulls only the
+transfers newer than a per-wallet cursor, applies them as deltas, and does a
+full get_usdt_trc20_balance re-read only on a periodic reconcile.
+"""
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+
+from bot.config import (
+    USDT_CONTRACT, TRONGRID_API_URL, TRONGRID_API_KEY, TRANSFER_STATE_FILE,
+    TRANSFER_RECONCILE_INTERVAL, TRANSFER_PAGE_LIMIT, TRANSFER_CURSOR_MARGIN,
+)
+from bot.balance_providers import USDT_DECIMALS
+from bot.http_client import api_request_json
+from bot.usdt_checker import get_usdt_trc20_balance, get_provider_chain
+
+
+class TransferTracker:
+    """
+    Tracks wallet balances by applying confirmed USDT transfers since a cursor.
+
+    Per-wallet state: tracked balance, cursor (newest block timestamp seen,
+    in ms), ids and timestamps of the transfers already accounted for within
+    TRANSFER_CURSOR_MARGIN of the cursor, and when the balance was last
+    reconciled against a full read. Every fetch starts one margin behind the
+    cursor, so a transfer the indexer confirms late is still picked up, and
+    the seen ids keep it from being applied twice.
+    """
+
+    def __init__(self, state_file: str = TRANSFER_STATE_FILE,
+                 reconcile_interval: float = TRANSFER_RECONCILE_INTERVAL,
+                 base_url: str = TRONGRID_API_URL, api_key: str | None = TRONGRID_API_KEY):
+        self.state_file = state_file
+        self.reconcile_interval = reconcile_interval
+        self.base_url = base_url.rstrip('/')
+        self.headers = {"TRON-PRO-API-KEY": api_key} if api_key else None
+        self._state = self._load_state()
+        self._lock = threading.Lock()
+
+        # Share the TronGrid provider's rate limiter when it is configured
+        self._limiter = next((p.limiter for p in get_provider_chain().providers if p.name == "trongrid"), None)
+
+        self.margin_ms = int(TRANSFER_CURSOR_MARGIN * 1000)
+        self.full_reads = 0
+        self.event_reads = 0
+        self.transfers_applied = 0
+
+    def update(self, address: str) -> Decimal | None:
+        """
+        Bring the tracked balance for an address up to date.
+
+        Args:
+            address: Tron wallet address
+
+        Returns:
+            Decimal | None: Current balance, or None if it could not be updated
+        """
+        with self._lock:
+            state = self._state.get(address)
+        if state is None or time.time() - state["reconciled_at"] >= self.reconcile_interval:
+            return self._reconcile(address, state)
+
+        cursor = state["cursor"]
+        seen = _seen_map(state["seen"], cursor)
+        try:
+            transfers = self._fetch_transfers(address, cursor - self.margin_ms)
+        except Exception as e:
+            print(f"Error fetching transfers for {address}: {e}")
+            return None
+
+        balance = Decimal(state["balance"])
+        applied = 0
+        for transfer in transfers:
+            tx_id = transfer.get("transaction_id")
+            if tx_id in seen:
+                continue
+            value = Decimal(transfer.get("value", "0")) / USDT_DECIMALS
+            if transfer.get("to") == address:
+                balance += value
+            if transfer.get("from") == address:
+                balance -= value
+            timestamp = transfer.get("block_timestamp", cursor)
+            seen[tx_id] = timestamp
+            cursor = max(cursor, timestamp)
+            applied += 1
+
+        with self._lock:
+            self.transfers_applied += applied
+            self._state[address] = {
+                "balance": str(balance),
+                "cursor": cursor,
+                "seen": self._prune_seen(seen, cursor),
+                "reconciled_at": state["reconciled_at"],
+            }
+        return balance
+
+    def forget(self, address: str):
+        """Drop tracking state for a wallet that is no longer monitored."""
+        with self._lock:
+            self._state.pop(address, None)
+
+    def save(self):
+        """Persist cursors and balances so a restart resumes incrementally."""
+        with self._lock:
+            data = json.dumps(self._state, indent=2)
+        tmp_path = f"{self.state_file}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.state_file)
+        except Exception as e:
+            print(f"Error saving transfer state: {e}")
+
+    def _reconcile(self, address: str, state: dict | None) -> Decimal | None:
+        """
+        Full balance re-read. The cursor is then taken from the chain (the newest
+        confirmed transfer), and every transfer the next fetch can return again
+        is marked as already included in the balance.
+        """
+        balance = get_usdt_trc20_balance(address)
+        if balance is None:
+            return None
+        # Look back two margins: the cursor ends up at least one margin past `window_start`,
+        # so everything the next fetch (cursor - margin onwards) returns is in `seen`
+        window_start = int(time.time() * 1000) - 2 * self.margin_ms
+        try:
+            recent = self._fetch_transfers(address, window_start)
+        except Exception as e:
+            print(f"Error fetching transfers for {address}: {e}")
+            return None
+
+        if state is not None and Decimal(state["balance"]) != balance:
+            print(f"ℹ️ Reconciled {address}: tracked {Decimal(state['balance']):,.6f} -> actual {balance:,.6f} USDT")
+
+        seen = {t.get("transaction_id"): t.get("block_timestamp", window_start) for t in recent}
+        cursor = max([window_start + self.margin_ms, *seen.values()])
+        with self._lock:
+            self.full_reads += 1
+            self._state[address] = {
+                "balance": str(balance),
+                "cursor": cursor,
+                "seen": self._prune_seen(seen, cursor),
+                "reconciled_at": time.time(),
+            }
+        return balance
+
+    def _prune_seen(self, seen: dict, cursor: int) -> dict:
+        """Keep only ids a fetch starting one margin behind the cursor can return again."""
+        return {tx_id: ts for tx_id, ts in seen.items() if ts >= cursor - self.margin_ms}
+
+    def _fetch_transfers(self, address: str, since_ms: int) -> list[dict]:
+        """All confirmed USDT transfers touching `address` at or after `since_ms`, oldest first."""
+        url = f"{self.base_url}/v1/accounts/{address}/transactions/trc20"
+        params = {
+            "contract_address": USDT_CONTRACT,
+            "only_confirmed": "true",
+            "min_timestamp": since_ms,
+            "order_by": "block_timestamp,asc",
+            "limit": TRANSFER_PAGE_LIMIT,
+        }
+        transfers = []
+        while True:
+            body = api_request_json("GET", url, params=params, headers=self.headers, limiter=self._limiter)
+            with self._lock:
+                self.event_reads += 1
+            transfers.extend(t for t in body.get("data", []) if t.get("type", "Transfer") == "Transfer")
+            fingerprint = body.get("meta", {}).get("fingerprint")
+            if not fingerprint:
+                return transfers
+            params = dict(params, fingerprint=fingerprint)
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error loading transfer state, starting fresh: {e}")
+            return {}
+
+
+def _seen_map(seen, cursor: int) -> dict:
+    """Seen transfers as {transaction_id: block_timestamp}; older state files stored a list of ids at the cursor."""
+    if isinstance(seen, list):
+        return dict.fromkeys(seen, cursor)
+    return dict(seen)
@@ -1,74 +1,253 @@
 # bot/usdt_checker.py
 """
-Provides functions to fetch USDT TRC20 wallet balances from the Tronscan API.
+Provides functions to fetch USDT TRC20 wallet balances from the balance providers.
 Handles API communication, data parsing, and prepares a human-readable summary.
 """
-import requests
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable
 from decimal import Decimal
 from datetime import datetime, timezone, timedelta
 
-from bot.config import API_TIMEOUT, USDT_CONTRACT, GMT_OFFSET
-from bot.wallet_manager import load_wallets
+from bot.config import (
+    GMT_OFFSET, FETCH_MAX_WORKERS, FETCH_DEADLINE, BALANCE_PROVIDERS, HEDGE_PERCENTILE,
+    BALANCE_CACHE_TTL, BALANCE_CACHE_STALE_TTL, BALANCE_CACHE_MAX_ENTRIES,
+)
+from bot.balance_cache import BalanceCache, BalanceReading, format_age
+from bot.balance_providers import BalanceFetchError, ProviderChain, build_provider_chain
+from bot.singleflight import SingleFlight
+from bot.wallet_registry import get_wallet_registry
+
+_provider_chain = build_provider_chain(BALANCE_PROVIDERS, hedge_percentile=HEDGE_PERCENTILE)
+
+# Coalesces concurrent lookups of the same address into one upstream request
+_balance_flight = SingleFlight()
 
 
 def get_wallets_for_checking():
-    """Get wallets in format needed for balance checking"""
-    wallet_data = load_wallets()
-    # Convert to simple format: {name: address}
-    return {name: data['address'] for name, data in wallet_data.items()}
+    """Get wallets in format needed for balance checking: {name: address}"""
+    return get_wallet_registry().addresses()
+
+
+def get_provider_chain() -> ProviderChain:
+    """Returns the provider chain used for balance lookups."""
+    return _provider_chain
+
 
+def set_provider_chain(chain: ProviderChain):
+    """Replace the provider chain (e.g. with local fake providers for testing)."""
+    global _provider_chain
+    _provider_chain = chain
 
-def get_usdt_trc20_balance(address: str) -> Decimal:
+
+def get_usdt_trc20_balance(address: str) -> Decimal | None:
     """
-    Fetches the USDT TRC20 balance for a given Tron address using the Tronscan API.
-    Handles network errors and unexpected API responses.
+    Fetches the USDT TRC20 balance for a given Tron address from the configured
+    providers (Tronscan first, with failover and optional hedging).
+    Transient failures are retried by the HTTP client; anything that still fails
+    is reported as None so callers never mistake an error for a zero balance.
+    Concurrent calls for the same address share a single upstream request.
 
     Args:
         address (str): The Tron wallet address to query.
 
     Returns:
-        Decimal: The USDT balance as a Decimal object, or Decimal('0.0') on error.
+        Decimal | None: The USDT balance as a Decimal object, or None on error.
     """
-    url = f"https://apilist.tronscanapi.com/api/account/tokens?address={address}"
-    
+    return _balance_flight.do(address, lambda: _fetch_usdt_trc20_balance(address))
+
+
+def _fetch_usdt_trc20_balance(address: str) -> Decimal | None:
+    """Performs the actual provider lookup behind get_usdt_trc20_balance."""
     try:
-        resp = requests.get(url, timeout=API_TIMEOUT)
-        resp.raise_for_status()
-
-        data = resp.json().get("data", [])
-        if not data:
-            print(f"Warning: No token data found for address {address}")
-            return Decimal('0.0')
-
-        for token in data:
-            if token.get("tokenId") == USDT_CONTRACT:
-                raw_balance_str = token.get("balance", "0")
-                try:
-                    raw_balance = Decimal(raw_balance_str)
-                except Exception as e:
-                    print(f"Error converting balance '{raw_balance_str}' for {address}: {e}")
-                    return Decimal('0.0')
-
-                # USDT TRC20 has 6 decimal places (1,000,000 sun per USDT)
-                return raw_balance / Decimal('1000000')
-        
-        # USDT token not found for this address
-        return Decimal('0.0')
-
-    except requests.exceptions.Timeout:
-        print(f"Error fetching balance for {address}: Request timed out")
-    except requests.exceptions.HTTPError as e:
-        print(f"Error fetching balance for {address}: HTTP error {e.response.status_code}")
-    except requests.exceptions.ConnectionError:
-        print(f"Error fetching balance for {address}: Connection error")
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching balance for {address}: Request error: {e}")
-    except ValueError as e:
-        print(f"Error decoding JSON for {address}: {e}")
+        return _provider_chain.fetch(address)
+    except BalanceFetchError as e:
+        print(f"Error fetching balance for {address}: {e}")
     except Exception as e:
         print(f"Unexpected error fetching balance for {address}: {e}")
-    
-    return Decimal('0.0')
+    return None
+
+
+_balance_cache = BalanceCache(
+    fetcher=get_usdt_trc20_balance,
+    ttl=BALANCE_CACHE_TTL,
+    stale_ttl=BALANCE_CACHE_STALE_TTL,
+    max_entries=BALANCE_CACHE_MAX_ENTRIES,
+)
+
+
+def get_balance_cache() -> BalanceCache:
+    """Returns the shared in-process balance cache."""
+    return _balance_cache
+
+
+def get_cached_usdt_balance(address: str) -> BalanceReading:
+    """
+    Returns the USDT balance for an address from the shared cache.
+    Fresh entries are served directly, stale ones are served while refreshing
+    in the background, and misses fall through to get_usdt_trc20_balance.
+
+    Args:
+        address (str): The Tron wallet address to query.
+
+    Returns:
+        BalanceReading: Balance (None on error) and its age in seconds
+    """
+    return _balance_cache.get(address)
+
+
+ResultCallback = Callable[[str, BalanceReading], None]
+
+
+def _notify(on_result: ResultCallback | None, name: str, future):
+    """Report one finished lookup to `on_result`; callback errors never break the batch."""
+    if on_result is None or future.cancelled() or future.exception() is not None:
+        return
+    try:
+        on_result(name, future.result())
+    except Exception as e:
+        print(f"Error in balance result callback for {name}: {e}")
+
+
+def fetch_balances(wallets: dict[str, str], max_workers: int = FETCH_MAX_WORKERS,
+                   deadline: float = FETCH_DEADLINE, on_result: ResultCallback | None = None) -> dict[str, BalanceReading]:
+    """
+    Fetches USDT balances for many wallets concurrently through the balance cache.
+    At most `max_workers` requests are in flight at once, and the whole batch
+    is bounded by `deadline` seconds so one slow address cannot stall the rest.
+
+    Args:
+        wallets (dict[str, str]): Dictionary mapping display names to Tron addresses
+        max_workers (int): Maximum number of concurrent API requests
+        deadline (float): Seconds to wait for the whole batch
+        on_result (callable): Called with (name, reading) as each lookup finishes,
+            from the fetching thread (e.g. to stream progress)
+
+    Returns:
+        dict[str, BalanceReading]: Readings in the same order as `wallets`.
+            A None balance means it could not be fetched (error or missed deadline).
+    """
+    if not wallets:
+        return {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(wallets))),
+                                  thread_name_prefix="balance-fetch")
+    try:
+        futures = {name: executor.submit(get_cached_usdt_balance, addr) for name, addr in wallets.items()}
+        for name, future in futures.items():
+            future.add_done_callback(lambda f, name=name: _notify(on_result, name, f))
+        done, not_done = wait(futures.values(), timeout=deadline)
+        if not_done:
+            print(f"Warning: {len(not_done)} balance request(s) missed the {deadline}s deadline")
+    finally:
+        # Don't block on stragglers - they finish (or time out) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    readings = {}
+    for name, future in futures.items():
+        if future not in done:
+            readings[name] = BalanceReading(None, None)
+            continue
+        try:
+            readings[name] = future.result()
+        except Exception as e:
+            print(f"Unexpected error fetching balance for {name}: {e}")
+            readings[name] = BalanceReading(None, None)
+
+    stats = _balance_cache.stats()
+    print(f"📦 Balance cache: {stats['hits']} hits, {stats['stale_hits']} stale, "
+          f"{stats['misses']} misses, {stats['fallbacks']} fallbacks, {stats['evictions']} evictions, "
+          f"{stats['size']} entries")
+    return readings
+
+
+_async_executor = None
+_async_executor_lock = threading.Lock()
+
+
+def _get_async_executor() -> ThreadPoolExecutor:
+    """Threads shared by every fetch_balances_async call, so concurrent commands share one bound."""
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="balance-fetch-async")
+        return _async_executor
+
+
+async def fetch_balances_async(wallets: dict[str, str], deadline: float = FETCH_DEADLINE,
+                               on_result: ResultCallback | None = None) -> dict[str, BalanceReading]:
+    """
+    Asyncio counterpart of fetch_balances for the async listener.
+    Lookups still go through the balance cache, single-flight, rate limiter and
+    provider chain; they run on a shared pool of FETCH_MAX_WORKERS threads, so
+    the event loop is never blocked and any number of commands can await
+    balances at once without each starting its own pool.
+
+    Args:
+        wallets (dict[str, str]): Dictionary mapping display names to Tron addresses
+        deadline (float): Seconds to wait for the whole batch
+        on_result (callable): Called on the event loop with (name, reading) as each lookup finishes
+
+    Returns:
+        dict[str, BalanceReading]: Readings in the same order as `wallets`.
+            A None balance means it could not be fetched (error or missed deadline).
+    """
+    if not wallets:
+        return {}
+
+    loop = asyncio.get_running_loop()
+    executor = _get_async_executor()
+    tasks = {name: loop.run_in_executor(executor, get_cached_usdt_balance, addr) for name, addr in wallets.items()}
+    for name, task in tasks.items():
+        task.add_done_callback(lambda f, name=name: _notify(on_result, name, f))
+    done, not_done = await asyncio.wait(tasks.values(), timeout=deadline)
+    if not_done:
+        print(f"Warning: {len(not_done)} balance request(s) missed the {deadline}s deadline")
+        for task in not_done:
+            task.cancel()
+
+    readings = {}
+    for name, task in tasks.items():
+        if task not in done:
+            readings[name] = BalanceReading(None, None)
+            continue
+        try:
+            readings[name] = task.result()
+        except Exception as e:
+            print(f"Unexpected error fetching balance for {name}: {e}")
+            readings[name] = BalanceReading(None, None)
+    return readings
+
+
+def describe_reading(reading: BalanceReading) -> str:
+    """Age note shown next to a balance, e.g. '12s ago' or 'last known, 3h ago'."""
+    if reading.degraded:
+        return f"last known, {format_age(reading.age)}"
+    return format_age(reading.age)
+
+
+def degraded_notice(readings: dict[str, BalanceReading]) -> str | None:
+    """
+    Builds a warning line when the balance API is degraded.
+
+    Args:
+        readings (dict[str, BalanceReading]): Readings returned by fetch_balances
+
+    Returns:
+        str | None: Warning text, or None when every provider is healthy
+    """
+    unavailable = _provider_chain.unavailable_providers()
+    fallbacks = sum(1 for reading in readings.values() if reading.degraded)
+    if not unavailable and not fallbacks:
+        return None
+
+    parts = []
+    if unavailable:
+        parts.append(f"balance API unavailable: {', '.join(unavailable)}")
+    if fallbacks:
+        parts.append(f"{fallbacks} wallet(s) showing last known values")
+    return f"⚠️ Degraded - {'; '.join(parts)}"
 
 
 def fetch_all_usdt_balances() -> tuple[str, dict[str, Decimal]]:
@@ -80,16 +259,18 @@ def fetch_all_usdt_balances() -> tuple[str, dict[str, Decimal]]:
         tuple[str, dict[str, Decimal]]: A tuple containing:
             - str: Human-readable summary message with individual and total balances
             - dict[str, Decimal]: Dictionary mapping wallet names to USDT balances
+              (wallets that could not be fetched are omitted)
     """
     wallets = get_wallets_for_checking()
     if not wallets:
         return "❌ No wallets configured", {}
     
-    # Fetch balances for each wallet
-    balances = {name: get_usdt_trc20_balance(addr) for name, addr in wallets.items()}
+    # Fetch balances for all wallets concurrently
+    results = fetch_balances(wallets)
+    balances = {name: reading.balance for name, reading in results.items() if reading.balance is not None}
     
     # Calculate total balance
-    total = sum(balances.values())
+    total = sum(balances.values(), Decimal('0'))
 
     # Get current time in GMT+7
     gmt_now = datetime.now(timezone(timedelta(hours=GMT_OFFSET)))
@@ -102,10 +283,17 @@ def fetch_all_usdt_balances() -> tuple[str, dict[str, Decimal]]:
         ""
     ]
 
-    for name, value in balances.items():
-        lines.append(f"• {name}: *{value:,.2f} USDT*")
+    for name, reading in results.items():
+        if reading.balance is None:
+            lines.append(f"• {name}: ❌ Unable to fetch balance")
+        else:
+            lines.append(f"• {name}: *{reading.balance:,.2f} USDT* _({describe_reading(reading)})_")
     
     lines.append("")
     lines.append(f"➕ *Total*: *{total:,.2f} USDT*")
 
+    notice = degraded_notice(results)
+    if notice:
+        lines.append(notice)
+
     return "\n".join(lines), balances
\ No newline at end of file
@@ -4,46 +4,87 @@ Module for visualizing cryptocurrency wallet balance trends.
 Generates multi-panel plots (small multiples) for individual wallets,
 displaying historical data and current balances in a clean, consistent format.
 """
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from pathlib import Path
 import math
+import os
+import shutil
 
 # --- FIX: Import NUM_RECORDS_TO_PLOT from central configuration ---
-from bot.config import NUM_RECORDS_TO_PLOT # <-- THIS WAS THE MISSING IMPORT
+from bot.config import (NUM_RECORDS_TO_PLOT, STORAGE_BACKEND, BALANCE_LOG_FORMAT, BALANCE_LOG_FILE, CSV_FILE,
+                        HISTORY_COLUMNAR_ENABLED, GMT_OFFSET, CHART_MAX_POINTS, CHART_PREVIEW_DPI,
+                        CHART_MARKER_MAX_POINTS) # <-- THIS WAS THE MISSING IMPORT
+from bot.balance_log import is_long_format
+from bot.chart_cache import get_chart_cache
+from bot.csv_tail import read_tail
+from bot.downsample import lttb_indices
 
 # Removed unused imports from datetime module that were commented out previously
 # from datetime import timedelta, datetime, timezone 
 
-def plot_wallet_trends(csv_path: str = "wallet_balances.csv", output_path: str = "wallet_trend.png") -> str | None:
+def plot_wallet_trends(csv_path: str | None = None, output_path: str | None = None,
+                       resolution: str | None = None, wallets: list[str] | None = None,
+                       dpi: int = 300, use_cache: bool = True, num_records: int = NUM_RECORDS_TO_PLOT,
+                       max_points: int | None = CHART_MAX_POINTS, preview: bool = False) -> str | None:
     """
     Generates a multi-panel plot (small multiples) showing USDT wallet balance trends.
     Each wallet gets its own subplot with its current balance displayed in the title.
     Data is sourced from a CSV, and timestamps are consistently displayed in GMT+7.
 
     Args:
-        csv_path (str): The file path to the CSV containing historical wallet balance data.
-                        (Assumes 'Timestamp' column is ISO 8601 string with +07:00 offset).
-        output_path (str): The file path where the generated chart image will be saved.
+        csv_path (str | None): The file path to the CSV containing historical wallet balance data,
+                        either the long-format balance log or the legacy wide CSV
+                        (timestamps are ISO 8601 strings with +07:00 offset).
+                        Defaults to the file configured by BALANCE_LOG_FORMAT.
+        output_path (str | None): Where to copy the chart image. By default the path of the
+                        rendered file in the chart cache is returned.
+        resolution (str | None): "hour" or "day" to plot the closing balance of the last
+                        `num_records` rollup buckets instead of raw snapshots.
+        wallets (list[str] | None): Only plot these wallets (default: all in the data window).
+        dpi (int): Output resolution.
+        use_cache (bool): Serve an identical earlier render from the chart cache.
+        num_records (int): Snapshots (or rollup buckets) in the window.
+        max_points (int | None): Downsample each wallet's line to at most this many points
+                        with LTTB; None draws every point.
+        preview (bool): Render at CHART_PREVIEW_DPI instead of `dpi` (quick Slack replies).
+
+    Unchanged charts (same data window, wallets and options) are not redrawn;
+    see bot.chart_cache.
 
     Returns:
         str | None: The path to the saved image file if successful, otherwise None.
     """
-    # NUM_RECORDS_TO_PLOT is now imported from bot.config.
-    # No need to define it locally or pass it as an argument here.
+    # The window defaults to NUM_RECORDS_TO_PLOT from bot.config.
+    if preview:
+        dpi = CHART_PREVIEW_DPI
 
-    try:
-        df = pd.read_csv(csv_path)
-    except FileNotFoundError:
-        print(f"❌ Error: CSV data file '{csv_path}' not found. Cannot plot trends.")
-        return None
-    except pd.errors.EmptyDataError:
-        print(f"❌ Error: CSV data file '{csv_path}' is empty or malformed. Cannot plot trends.")
-        return None
-    except Exception as e:
-        print(f"❌ An unexpected error occurred while reading CSV '{csv_path}': {e}")
-        return None
+    if resolution is not None:
+        df = load_rollup_frame(resolution, num_records)
+        if df is None:
+            return None
+        csv_path = f"{resolution} rollups"
+    elif STORAGE_BACKEND == "sqlite":
+        df = load_sqlite_history_frame(num_records)
+        if df is None:
+            return None
+        csv_path = "SQLite balance history"
+    elif csv_path is None and HISTORY_COLUMNAR_ENABLED and BALANCE_LOG_FORMAT == "long":
+        df = load_columnar_history_frame(num_records)
+        if df is None:
+            return None
+        csv_path = "columnar balance history"
+    else:
+        if csv_path is None:
+            csv_path = BALANCE_LOG_FILE if BALANCE_LOG_FORMAT == "long" else CSV_FILE
+        # Rows logged by this process may still be buffered
+        from bot.balance_log import flush_balance_logs
+        flush_balance_logs()
+        df = _read_csv_frame(csv_path, num_records)
+        if df is None:
+            return None
 
     if "Timestamp" not in df.columns:
         print(f"❌ Error: 'Timestamp' column not found in '{csv_path}'. Please check CSV header.")
@@ -55,14 +96,55 @@ def plot_wallet_trends(csv_path: str = "wallet_balances.csv", output_path: str =
     # we strip the '+07:00' offset from the string BEFORE parsing to create NAIVE datetime objects.
     df["Timestamp"] = pd.to_datetime(df["Timestamp"].astype(str).str.split('+').str[0])
 
-    # Take the last 'NUM_RECORDS_TO_PLOT' unique time points, ensuring sorting by Timestamp.
-    # Uses the imported NUM_RECORDS_TO_PLOT from config.
-    df = df.drop_duplicates(subset=['Timestamp']).sort_values("Timestamp").tail(NUM_RECORDS_TO_PLOT)
+    # Take the last 'num_records' unique time points, ensuring sorting by Timestamp.
+    df = df.drop_duplicates(subset=['Timestamp']).sort_values("Timestamp").tail(num_records)
 
     if df.empty:
-        print(f"ℹ️ Not enough data points ({NUM_RECORDS_TO_PLOT} records) in '{csv_path}' to plot trends.")
+        print(f"ℹ️ Not enough data points ({num_records} records) in '{csv_path}' to plot trends.")
+        return None
+
+    if wallets:
+        selected = [wallet for wallet in wallets if wallet in df.columns]
+        if not selected:
+            print(f"ℹ️ None of the requested wallets have data in '{csv_path}'.")
+            return None
+        df = df[["Timestamp"] + selected]
+
+    cache = get_chart_cache()
+    key = cache.key(df, dpi=dpi, resolution=resolution, max_points=max_points)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"♻️ Chart served from cache: {cached}")
+            return _deliver_chart(cached, output_path)
+
+    rendered = _render_chart(df, cache.temp_path(key), dpi, max_points)
+    if rendered is None:
         return None
+    return _deliver_chart(cache.store(key, rendered), output_path)
+
+
+def _deliver_chart(path: str, output_path: str | None) -> str:
+    if output_path is None:
+        return path
+    output_path = str(Path(output_path))
+    shutil.copyfile(path, output_path)
+    return output_path
 
+
+def _downsample(timestamps: pd.Series, values: pd.Series, max_points: int | None) -> tuple[pd.Series, pd.Series]:
+    """Drop gaps (wallet not present) and reduce the series to `max_points` with LTTB."""
+    mask = values.notna().to_numpy()
+    timestamps, values = timestamps[mask], values[mask]
+    if max_points is None or len(values) <= max_points:
+        return timestamps, values
+    seconds = (timestamps.to_numpy().astype("datetime64[ns]").astype(np.int64) - timestamps.iloc[0].value) / 1e9
+    indices = lttb_indices(seconds, values.to_numpy(dtype=np.float64), max_points)
+    return timestamps.iloc[indices], values.iloc[indices]
+
+
+def _render_chart(df: pd.DataFrame, output_path: str, dpi: int, max_points: int | None = None) -> str | None:
+    """Draw the small-multiples figure for a prepared Timestamp + wallet-columns frame."""
     wallet_columns = df.columns[1:] # Get wallet names (excluding 'Timestamp')
     num_wallets = len(wallet_columns)
 
@@ -89,8 +171,11 @@ def plot_wallet_trends(csv_path: str = "wallet_balances.csv", output_path: str =
         fontsize=16, y=1.02 # Adjust y to ensure padding above subplots
     )
 
+    # 15-minute minor ticks only make sense (and stay cheap) for windows of a couple of days
+    short_window = df['Timestamp'].iloc[-1] - df['Timestamp'].iloc[0] <= pd.Timedelta(days=2)
+
     # Prepare a categorical colormap for distinct line colors for each wallet
-    colors = plt.cm.get_cmap('tab10', num_wallets)
+    colors = plt.get_cmap('tab10', num_wallets)
 
     # --- Iterate through each wallet and create/populate its subplot ---
     for i, col in enumerate(wallet_columns):
@@ -101,7 +186,10 @@ def plot_wallet_trends(csv_path: str = "wallet_balances.csv", output_path: str =
         # Plot the line on the current subplot, using a unique color for the wallet
         # Only plot if there's any positive balance to avoid issues with empty scales.
         if last_value > 0 or df[col].max() > 0: 
-            ax.plot(df["Timestamp"], df[col], marker="o", markersize=4, 
+            # Long windows are reduced per wallet so drawing cost stays flat; markers only while readable
+            timestamps, values = _downsample(df["Timestamp"], df[col], max_points)
+            marker = "o" if len(values) <= CHART_MARKER_MAX_POINTS else None
+            ax.plot(timestamps, values, marker=marker, markersize=4, 
                     linewidth=1.2, color=colors(i)) 
         else:
             # If a wallet's balance is consistently zero, print a note and skip plotting its line
@@ -113,7 +201,8 @@ def plot_wallet_trends(csv_path: str = "wallet_balances.csv", output_path: str =
         # X-axis formatting for each subplot (labels only on bottom-most row due to sharex=True)
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d\n%H:%M'))
         ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-        ax.xaxis.set_minor_locator(mdates.MinuteLocator(interval=15)) # Minor ticks for finer grid
+        if short_window:
+            ax.xaxis.set_minor_locator(mdates.MinuteLocator(interval=15)) # Minor ticks for finer grid
         ax.tick_params(axis='x', rotation=0, labelsize=8) # Set tick label font size and rotation
         ax.tick_params(axis='y', labelsize=8)
 
@@ -134,14 +223,117 @@ def plot_wallet_trends(csv_path: str = "wallet_balances.csv", output_path: str =
     # `plt.tight_layout()` adjusts spacing between subplots for compactness.
     plt.tight_layout(rect=[0.05, 0.05, 0.98, 0.98]) 
 
-    output_path = str(Path(output_path))
     try:
-        plt.savefig(output_path, dpi=300, bbox_inches="tight") # Save with high DPI and tight bounding box
+        plt.savefig(output_path, dpi=dpi, bbox_inches="tight") # Save with high DPI and tight bounding box
         print(f"✅ Chart saved to {output_path}")
     except Exception as e:
         print(f"❌ Error saving chart to {output_path}: {e}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
         return None
     finally:
         plt.close(fig) # Always close the figure to free up memory, especially in cron jobs
 
-    return output_path
\ No newline at end of file
+    return output_path
+
+def _read_csv_frame(csv_path: str, num_records: int = NUM_RECORDS_TO_PLOT) -> pd.DataFrame | None:
+    """
+    Read the last `num_records` snapshots of a wide Timestamp,<wallet>,... CSV or a
+    long timestamp,wallet,address,balance log, seeking from the end of the file
+    instead of parsing all of it.
+    """
+    try:
+        header, rows = read_tail(csv_path, num_records)
+    except FileNotFoundError:
+        print(f"❌ Error: CSV data file '{csv_path}' not found. Cannot plot trends.")
+        return None
+    except Exception as e:
+        print(f"❌ An unexpected error occurred while reading CSV '{csv_path}': {e}")
+        return None
+
+    if not header or not rows:
+        print(f"❌ Error: CSV data file '{csv_path}' is empty or malformed. Cannot plot trends.")
+        return None
+
+    # Rows written before/after a wallet change can be shorter/longer than the header
+    width = len(header)
+    df = pd.DataFrame([(row + [""] * width)[:width] for row in rows], columns=header)
+    if is_long_format(header):
+        return _long_to_wide(df.rename(columns={"timestamp": "Timestamp", "wallet": "Wallet",
+                                                "balance": "Balance"}))
+    for column in df.columns[1:]:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+def load_sqlite_history_frame(num_records: int) -> pd.DataFrame | None:
+    """
+    Pull the last `num_records` snapshots from SQLite (timestamp index, no full scan)
+    and pivot them into the same wide layout the CSV uses.
+    """
+    from bot import sqlite_store
+
+    try:
+        rows = sqlite_store.query_recent_history(num_records)
+    except Exception as e:
+        print(f"❌ Error reading balance history from SQLite: {e}")
+        return None
+    if not rows:
+        print("ℹ️ No balance history in SQLite yet. Cannot plot trends.")
+        return None
+
+    return _long_to_wide(pd.DataFrame(rows, columns=["Timestamp", "Wallet", "Balance"]))
+
+
+def load_columnar_history_frame(num_records: int) -> pd.DataFrame | None:
+    """
+    Pull the last `num_records` snapshots from the Parquet partitions and the
+    hot log, loading only the timestamp/wallet/balance columns and only the
+    newest months needed.
+    """
+    from datetime import timedelta, timezone
+    from bot.balance_log import flush_balance_logs
+    from bot import history_store
+
+    flush_balance_logs()
+    if not history_store.columnar_available():
+        return _read_csv_frame(BALANCE_LOG_FILE, num_records)
+    try:
+        long_df = history_store.read_recent_history(num_records, columns=["wallet", "balance"])
+    except Exception as e:
+        print(f"❌ Error reading columnar balance history: {e}")
+        return None
+    if long_df.empty:
+        print("ℹ️ No balance history yet. Cannot plot trends.")
+        return None
+
+    long_df["timestamp"] = long_df["timestamp"].dt.tz_convert(timezone(timedelta(hours=GMT_OFFSET)))
+    return _long_to_wide(long_df.rename(columns={"timestamp": "Timestamp", "wallet": "Wallet",
+                                                 "balance": "Balance"}))
+
+
+def load_rollup_frame(resolution: str, num_buckets: int) -> pd.DataFrame | None:
+    """Closing balance per wallet for the newest `num_buckets` hourly or daily rollup buckets."""
+    from bot import rollups
+
+    try:
+        rows = rollups.query_rollups(rollups.WALLET, resolution, limit=num_buckets)
+    except Exception as e:
+        print(f"❌ Error reading {resolution} rollups: {e}")
+        return None
+    if not rows:
+        print(f"ℹ️ No {resolution} rollups yet. Cannot plot trends.")
+        return None
+
+    return _long_to_wide(pd.DataFrame([(bucket, name, close) for name, bucket, _, _, _, close, _ in rows],
+                                      columns=["Timestamp", "Wallet", "Balance"]))
+
+
+def _long_to_wide(long_df: pd.DataFrame) -> pd.DataFrame:
+    """Pivot Timestamp/Wallet/Balance rows into one column per wallet (first-seen order)."""
+    long_df["Balance"] = long_df["Balance"].astype(float)
+    wide = long_df.pivot_table(index="Timestamp", columns="Wallet", values="Balance", aggfunc="last", sort=False)
+    wallet_order = [wallet for wallet in dict.fromkeys(long_df["Wallet"]) if wallet in wide.columns]
+    wide = wide[wallet_order].reset_index()
+    wide.columns.name = None
+    return wide
@@ -2,38 +2,31 @@
 """
 Core wallet management functions.
 Handles loading, saving, adding, and removing wallets from JSON storage.
+Single changes are journaled (see bot.wallet_store) instead of rewriting the file.
+With STORAGE_BACKEND=sqlite the wallets table in bot.sqlite_store is used instead.
 """
-import json
 import re
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
-from bot.config import WALLETS_FILE
+from bot.config import WALLETS_FILE, STORAGE_BACKEND, IMPORT_DEADLINE
+from bot.wallet_registry import get_wallet_registry
+from bot.wallet_store import WalletConflictError, append_adds, append_change, write_wallets
 
 
 def load_wallets() -> Dict[str, Dict[str, str]]:
     """
-    Load wallet data from JSON file.
+    Load wallet data from the cached wallet registry.
+    The JSON file is only re-parsed when it changed on disk.
     
     Returns:
         Dict: Full wallet data structure with metadata
     """
-    try:
-        with open(WALLETS_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Wallet file {WALLETS_FILE} not found")
-        return {}
-    except json.JSONDecodeError as e:
-        print(f"Error parsing wallet JSON: {e}")
-        return {}
-    except Exception as e:
-        print(f"Error loading wallets: {e}")
-        return {}
+    return get_wallet_registry().snapshot()
 
 
 def save_wallets(wallet_data: Dict[str, Dict[str, str]]) -> bool:
     """
-    Save wallet data to JSON file.
+    Replace the whole wallet file (atomically) and refresh the wallet registry.
     
     Args:
         wallet_data: Full wallet data structure
@@ -42,14 +35,88 @@ def save_wallets(wallet_data: Dict[str, Dict[str, str]]) -> bool:
         bool: True if saved successfully, False otherwise
     """
     try:
-        with open(WALLETS_FILE, 'w') as f:
-            json.dump(wallet_data, f, indent=2)
+        signature = None
+        if STORAGE_BACKEND == "sqlite":
+            from bot import sqlite_store
+            sqlite_store.replace_wallets(wallet_data)
+        else:
+            signature = write_wallets(wallet_data, WALLETS_FILE)
+        get_wallet_registry().replace(wallet_data, signature)
         return True
     except Exception as e:
         print(f"Error saving wallets: {e}")
+        get_wallet_registry().invalidate()
         return False
 
 
+def record_wallet_change(op: str, wallet_key: str, wallet_info: Dict[str, str] | None = None) -> bool:
+    """
+    Journal a single wallet change and apply it to the wallet registry.
+    
+    Args:
+        op: "add" or "remove"
+        wallet_key: Wallet key
+        wallet_info: Wallet data for "add"
+        
+    Returns:
+        bool: True if recorded successfully, False otherwise
+        
+    Raises:
+        WalletConflictError: If an added key or address is already stored
+    """
+    try:
+        signatures = None
+        if STORAGE_BACKEND == "sqlite":
+            from bot import sqlite_store
+            if op == "add":
+                sqlite_store.add_wallet(wallet_key, wallet_info)
+            else:
+                sqlite_store.remove_wallet(wallet_key)
+        else:
+            registry = get_wallet_registry()
+            signatures = append_change(op, wallet_key, wallet_info, WALLETS_FILE,
+                                       find_conflict=registry.find_conflict)
+        get_wallet_registry().apply_change(op, wallet_key, wallet_info, signatures)
+        return True
+    except WalletConflictError:
+        # Nothing was written; a stale registry already mismatches the store signature and reloads
+        raise
+    except Exception as e:
+        print(f"Error saving wallet change: {e}")
+        get_wallet_registry().invalidate()
+        return False
+
+
+def record_wallet_adds(new_wallets: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """
+    Add many wallets, re-checking each against the current store so that
+    concurrent !add/!remove changes are kept. Never rewrites the whole store.
+    
+    Args:
+        new_wallets: Wallet key to wallet data
+        
+    Returns:
+        Dict[str, str]: Error message per wallet that was not added
+    """
+    errors: Dict[str, str] = {}
+    try:
+        if STORAGE_BACKEND == "sqlite":
+            from bot import sqlite_store
+            for wallet_key, wallet_info in new_wallets.items():
+                try:
+                    sqlite_store.add_wallet(wallet_key, wallet_info)
+                except WalletConflictError as e:
+                    errors[wallet_key] = str(e)
+        else:
+            errors.update(append_adds(new_wallets, WALLETS_FILE))
+    except Exception as e:
+        print(f"Error saving imported wallets: {e}")
+        errors.update({key: "Failed to save wallet to file" for key in new_wallets if key not in errors})
+    finally:
+        get_wallet_registry().invalidate()
+    return errors
+
+
 def validate_trc20_address(address: str) -> bool:
     """
     Validate TRC20 address format.
@@ -102,14 +169,14 @@ def add_wallet(company: str, wallet_name: str, address: str) -> Tuple[bool, str]
     # Load current wallets
     wallets = load_wallets()
     
-    # Check if wallet key already exists
+    # Fail fast before the balance test; re-checked under the store lock when saving
     if wallet_key in wallets:
         return False, f"❌ Wallet '{wallet_key}' already exists"
 
     # Check if address is already used
-    for existing_key, wallet_info in wallets.items():
-        if wallet_info.get('address') == address:
-            return False, f"❌ Address already used by '{existing_key}'"
+    existing_key = get_wallet_registry().find_by_address(address)
+    if existing_key is not None:
+        return False, f"❌ Address already used by '{existing_key}'"
     
     # Test the address by fetching balance
     try:
@@ -129,8 +196,11 @@ def add_wallet(company: str, wallet_name: str, address: str) -> Tuple[bool, str]
     }
     
     # Save to file
-    if not save_wallets(wallets):
-        return False, "❌ Failed to save wallet to file"
+    try:
+        if not record_wallet_change("add", wallet_key, wallets[wallet_key]):
+            return False, "❌ Failed to save wallet to file"
+    except WalletConflictError as e:
+        return False, f"❌ {e}"
     
     # Success message
     message = f"""✅ **Wallet Added Successfully**
@@ -146,6 +216,69 @@ def add_wallet(company: str, wallet_name: str, address: str) -> Tuple[bool, str]
     return True, message
 
 
+def import_wallets(rows: List[Tuple[int, str, str, str]]) -> Tuple[int, List[str]]:
+    """
+    Add many wallets at once.
+    All rows are validated in one pass (set lookups for duplicates against the
+    stored wallets and earlier rows), the remaining addresses are checked
+    against the API in parallel, and everything accepted is journaled with one
+    append. Duplicates are checked again at that point, since !add/!remove may
+    have run during the balance checks.
+    
+    Args:
+        rows: (row_number, company, wallet_name, address) tuples
+        
+    Returns:
+        Tuple[int, List[str]]: (number of wallets added, per-row result lines)
+    """
+    wallets = load_wallets()
+    taken_keys = set(wallets)
+    taken_addresses = {info.get('address'): key for key, info in wallets.items()}
+    
+    results: Dict[int, str] = {}
+    candidates: Dict[str, Tuple[int, Dict[str, str]]] = {}
+    
+    for row_no, company, wallet_name, address in rows:
+        company, wallet_name, address = company.strip(), wallet_name.strip(), address.strip()
+        label = f"Row {row_no} `{wallet_name or '?'}`"
+        
+        if not company or not wallet_name or not address:
+            results[row_no] = f"• {label}: ❌ Expected company,wallet,address"
+        elif not validate_trc20_address(address):
+            results[row_no] = f"• {label}: ❌ Invalid TRC20 address format"
+        elif wallet_name in taken_keys:
+            results[row_no] = f"• {label}: ❌ Wallet already exists"
+        elif address in taken_addresses:
+            results[row_no] = f"• {label}: ❌ Address already used by '{taken_addresses[address]}'"
+        else:
+            taken_keys.add(wallet_name)
+            taken_addresses[address] = wallet_name
+            candidates[wallet_name] = (row_no, {"company": company, "wallet": wallet_name, "address": address})
+    
+    # Test the new addresses concurrently
+    from bot.usdt_checker import fetch_balances
+    
+    readings = fetch_balances({key: info['address'] for key, (_, info) in candidates.items()},
+                              deadline=IMPORT_DEADLINE)
+    
+    accepted = {}
+    for wallet_key, (row_no, info) in candidates.items():
+        balance = readings[wallet_key].balance
+        if balance is None:
+            results[row_no] = f"• Row {row_no} `{wallet_key}`: ❌ Unable to fetch balance (invalid or API error)"
+        else:
+            accepted[wallet_key] = info
+            results[row_no] = f"• Row {row_no} `{wallet_key}`: ✅ Added ({balance:,.2f} USDT)"
+    
+    if accepted:
+        for wallet_key, error in record_wallet_adds(accepted).items():
+            row_no = candidates[wallet_key][0]
+            results[row_no] = f"• Row {row_no} `{wallet_key}`: ❌ {error}"
+            del accepted[wallet_key]
+    
+    return len(accepted), [results[row_no] for row_no in sorted(results)]
+
+
 def remove_wallet(wallet_key: str) -> Tuple[bool, str]:
     """
     Remove a wallet from storage.
@@ -185,9 +318,7 @@ def remove_wallet(wallet_key: str) -> Tuple[bool, str]:
     del wallets[wallet_key]
     
     # Save to file
-    if not save_wallets(wallets):
-        # Rollback on save failure
-        wallets[wallet_key] = wallet_info
+    if not record_wallet_change("remove", wallet_key):
         return False, "❌ Failed to save changes to file"
     
     # Success message
@@ -210,26 +341,19 @@ def list_wallets() -> Tuple[bool, str]:
     Returns:
         Tuple[bool, str]: (success, formatted_list)
     """
-    wallets = load_wallets()
+    # One call, so the grouping and the wallet data cannot come from different reloads
+    wallets, companies = get_wallet_registry().snapshot_by_company()
     
     if not wallets:
         return False, "❌ No wallets configured\n\nUse `!add \"company\" \"wallet\" \"address\"` to add wallets"
     
-    # Group by company
-    companies = {}
-    for wallet_key, wallet_info in wallets.items():
-        company = wallet_info.get('company', 'Unknown')
-        if company not in companies:
-            companies[company] = []
-        companies[company].append((wallet_key, wallet_info))
-    
-    # Format output
+    # Format output, grouped by company
     lines = []
     
-    for company, wallet_list in companies.items():
+    for company, wallet_keys in companies.items():
         lines.append(f"**{company}:**")
-        for wallet_key, wallet_info in wallet_list:
-            address = wallet_info.get('address', 'Unknown')
+        for wallet_key in wallet_keys:
+            address = wallets[wallet_key].get('address', 'Unknown')
             lines.append(f"• **{wallet_key}**: {address}")
         lines.append("")  # Empty line between companies
     
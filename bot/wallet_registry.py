@@ -0,0 +1,230 @@
+# bot/wallet_registry.py
+"""
+Cached, indexed view of the wallet list.
+Parses the wallet store only when its mtime/size changes and keeps O(1)
+indexes by wallet key, address, lowercased name and company.
+"""
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bot.config import WALLETS_FILE, STORAGE_BACKEND, SQLITE_DB_FILE
+from bot.wallet_store import read_wallets, store_signature
+
+
+class WalletRegistry:
+    """
+    In-memory wallet registry with mtime-based hot reload.
+
+    Every accessor first checks the modification time and size of the wallet
+    snapshot and its journal; the store is re-read and the indexes rebuilt
+    only when either changed, e.g. after an edit by another process.
+    `loader` and `signature` can be swapped for another backend (see
+    get_wallet_registry for SQLite).
+    """
+
+    def __init__(self, path: str = WALLETS_FILE,
+                 loader: Callable[[str], Dict[str, Dict[str, str]]] = read_wallets,
+                 signature: Callable[[str], Optional[tuple]] = store_signature):
+        self.path = path
+        self._loader = loader
+        self._store_signature = signature
+        self._lock = threading.RLock()
+        self._signature = None
+        self._wallets: Dict[str, Dict[str, str]] = {}
+        self._by_address: Dict[str, str] = {}
+        self._by_lower_name: Dict[str, str] = {}
+        self._by_company: Dict[str, List[str]] = {}
+        self.reloads = 0
+
+    def snapshot(self) -> Dict[str, Dict[str, str]]:
+        """Shallow copy of the full wallet data, safe for callers to modify."""
+        with self._lock:
+            self._refresh()
+            return dict(self._wallets)
+
+    def addresses(self) -> Dict[str, str]:
+        """Mapping of wallet key to address."""
+        with self._lock:
+            self._refresh()
+            return {name: info['address'] for name, info in self._wallets.items()}
+
+    def get(self, wallet_key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            self._refresh()
+            return self._wallets.get(wallet_key)
+
+    def find_by_address(self, address: str) -> Optional[str]:
+        """Wallet key using this address, or None."""
+        with self._lock:
+            self._refresh()
+            return self._by_address.get(address)
+
+    def find_by_name(self, name: str) -> Optional[str]:
+        """Wallet key matching `name` case-insensitively, or None."""
+        with self._lock:
+            self._refresh()
+            return self._by_lower_name.get(name.strip().lower())
+
+    def by_company(self, company: str) -> List[str]:
+        """Wallet keys belonging to a company, in file order."""
+        with self._lock:
+            self._refresh()
+            return list(self._by_company.get(company, []))
+
+    def companies(self) -> Dict[str, List[str]]:
+        """Company name to wallet keys, in file order."""
+        with self._lock:
+            self._refresh()
+            return {company: list(keys) for company, keys in self._by_company.items()}
+
+    def snapshot_by_company(self) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[str]]]:
+        """snapshot() and companies() taken together, so both come from the same load."""
+        with self._lock:
+            self._refresh()
+            return dict(self._wallets), {company: list(keys) for company, keys in self._by_company.items()}
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._wallets)
+
+    def replace(self, wallet_data: Dict[str, Dict[str, str]], signature: Optional[tuple] = None):
+        """
+        Adopt data that was just written to disk, skipping the re-read.
+        `signature` must be taken under the write lock; without it the next access reloads.
+        """
+        with self._lock:
+            self._index(dict(wallet_data))
+            self._signature = signature
+
+    def apply_change(self, op: str, key: str, value: Optional[Dict[str, str]] = None,
+                     signatures: Optional[tuple] = None):
+        """
+        Apply a change that was just journaled, updating the indexes in place.
+
+        Args:
+            signatures: (before, after) store signatures taken under the write lock. The new
+                signature is adopted only if this registry was current right before the write;
+                otherwise another process changed the store too and the next access reloads.
+        """
+        with self._lock:
+            if op == "add":
+                self._remove_from_indexes(key)
+                self._wallets[key] = value
+                if value.get('address'):
+                    self._by_address.setdefault(value['address'], key)
+                self._by_lower_name.setdefault(key.lower(), key)
+                self._by_company.setdefault(value.get('company', 'Unknown'), []).append(key)
+            elif op == "remove":
+                self._remove_from_indexes(key)
+                self._wallets.pop(key, None)
+            if signatures is not None and self._signature is not None and self._signature == signatures[0]:
+                self._signature = signatures[1]
+            else:
+                self._signature = None
+
+    def find_conflict(self, signature: Optional[tuple], key: str,
+                      value: Dict[str, str]) -> Tuple[bool, Optional[str]]:
+        """
+        Duplicate key/address check from the indexes, for wallet_store.append_change.
+
+        Returns:
+            tuple: (answered, error) - answered is False unless the indexes reflect `signature`
+        """
+        with self._lock:
+            if signature is None or signature != self._signature:
+                return False, None
+            if key in self._wallets:
+                return True, f"Wallet '{key}' already exists"
+            existing_key = self._by_address.get(value.get('address'))
+            if existing_key is not None:
+                return True, f"Address already used by '{existing_key}'"
+            return True, None
+
+    def invalidate(self):
+        """Force a re-read on next access."""
+        with self._lock:
+            self._signature = None
+
+    def _refresh(self):
+        """Reload from disk if the file changed since the last load. Caller must hold the lock."""
+        signature = self._store_signature(self.path)
+        if signature is not None and signature == self._signature:
+            return
+        if signature is None:
+            if self._signature is not None or self.reloads == 0:
+                print(f"Wallet file {self.path} not found")
+            self._index({})
+            self._signature = None
+            self.reloads += 1
+            return
+
+        try:
+            data = self._loader(self.path)
+        except FileNotFoundError:
+            # Removed between stat and read - picked up on the next access
+            return
+        except json.JSONDecodeError as e:
+            # Keep serving the last good copy; a writer may be mid-update
+            print(f"Error parsing wallet JSON: {e}")
+            return
+        except Exception as e:
+            print(f"Error loading wallets: {e}")
+            return
+
+        self._index(data)
+        self._signature = signature
+        self.reloads += 1
+
+    def _remove_from_indexes(self, key: str):
+        """Drop one wallet from the secondary indexes. Caller must hold the lock."""
+        info = self._wallets.get(key)
+        if info is None:
+            return
+        if self._by_address.get(info.get('address')) == key:
+            del self._by_address[info['address']]
+        if self._by_lower_name.get(key.lower()) == key:
+            del self._by_lower_name[key.lower()]
+        company = info.get('company', 'Unknown')
+        keys = self._by_company.get(company, [])
+        if key in keys:
+            keys.remove(key)
+            if not keys:
+                del self._by_company[company]
+
+    def _index(self, data: Dict[str, Dict[str, str]]):
+        """Rebuild all lookup indexes. Caller must hold the lock."""
+        by_address = {}
+        by_lower_name = {}
+        by_company: Dict[str, List[str]] = {}
+        for key, info in data.items():
+            address = info.get('address')
+            if address:
+                by_address.setdefault(address, key)
+            by_lower_name.setdefault(key.lower(), key)
+            by_company.setdefault(info.get('company', 'Unknown'), []).append(key)
+
+        self._wallets = data
+        self._by_address = by_address
+        self._by_lower_name = by_lower_name
+        self._by_company = by_company
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_wallet_registry() -> WalletRegistry:
+    """Return the process-wide wallet registry for the configured storage backend."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                if STORAGE_BACKEND == "sqlite":
+                    from bot import sqlite_store
+                    _registry = WalletRegistry(SQLITE_DB_FILE, loader=sqlite_store.load_wallets,
+                                               signature=sqlite_store.store_signature)
+                else:
+                    _registry = WalletRegistry(WALLETS_FILE)
+    return _registry
@@ -0,0 +1,299 @@
+# bot/wallet_store.py
+"""
+Crash-safe storage for the wallet list.
+The wallet file is a snapshot; every !add/!remove is appended to a small
+change journal instead of rewriting the whole file. The journal is replayed
+on load and periodically compacted into a new snapshot that replaces the
+old one atomically. A lock file keeps the listener and cron jobs from
+interleaving writes.
+"""
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from bot.config import WALLETS_FILE, WALLET_JOURNAL_COMPACT_EVERY
+
+
+class WalletConflictError(Exception):
+    """An added wallet's key or address is already in the store."""
+
+
+def journal_path(path: str = WALLETS_FILE) -> str:
+    return f"{path}.journal"
+
+
+def lock_path(path: str = WALLETS_FILE) -> str:
+    return f"{path}.lock"
+
+
+@contextmanager
+def wallet_file_lock(path: str = WALLETS_FILE, exclusive: bool = True):
+    """Hold an advisory lock on the wallet store (shared for reads, exclusive for writes)."""
+    with open(lock_path(path), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def store_signature(path: str = WALLETS_FILE) -> Optional[tuple]:
+    """
+    Cheap change marker for the store: (mtime, size) of the snapshot and journal.
+
+    Returns:
+        tuple | None: Signature, or None if the snapshot does not exist
+    """
+    try:
+        snapshot = os.stat(path)
+    except FileNotFoundError:
+        return None
+    try:
+        journal = os.stat(journal_path(path))
+        journal_sig = (journal.st_mtime_ns, journal.st_size)
+    except FileNotFoundError:
+        journal_sig = None
+    return (snapshot.st_mtime_ns, snapshot.st_size, journal_sig)
+
+
+def read_wallets(path: str = WALLETS_FILE) -> Dict[str, Dict[str, str]]:
+    """
+    Load the snapshot and replay the journal on top of it.
+
+    Raises:
+        FileNotFoundError: If the snapshot does not exist
+        json.JSONDecodeError: If the snapshot is corrupt
+    """
+    with wallet_file_lock(path, exclusive=False):
+        with open(path, 'r') as f:
+            wallets = json.load(f)
+        _replay_journal(path, wallets)
+    return wallets
+
+
+def append_change(op: str, key: str, value: Optional[Dict[str, str]] = None, path: str = WALLETS_FILE,
+                  find_conflict: Optional[Callable[[Optional[tuple], str, Dict[str, str]],
+                                                   Tuple[bool, Optional[str]]]] = None
+                  ) -> Tuple[Optional[tuple], Optional[tuple]]:
+    """
+    Durably record one wallet change.
+    For "add", the key and address are checked for duplicates against the
+    current store while the exclusive lock is held.
+
+    Args:
+        op: "add" or "remove"
+        key: Wallet key
+        value: Wallet info for "add"
+        path: Snapshot path
+        find_conflict: Optional in-memory duplicate check, called with the store
+            signature under the lock; returns (answered, error). When it cannot
+            answer for that signature (the caller's view is stale), the store is read.
+
+    Returns:
+        tuple: (before, after) store signatures, both taken under the lock
+
+    Raises:
+        WalletConflictError: If an added key or address is already stored
+    """
+    entry = {"op": op, "key": key}
+    if value is not None:
+        entry["value"] = value
+
+    with wallet_file_lock(path):
+        if not os.path.exists(path):
+            # First wallet ever - start from an empty snapshot so the journal has a base
+            _write_snapshot(path, {})
+        before = store_signature(path)
+        if op == "add":
+            answered, error = find_conflict(before, key, value) if find_conflict else (False, None)
+            if not answered:
+                error = _find_conflict(_read_locked(path), key, value)
+            if error:
+                raise WalletConflictError(error)
+        line = json.dumps(entry) + "\n"
+        if not _journal_ends_cleanly(path):
+            # Terminate a line torn by an earlier crash so this entry stays readable
+            line = "\n" + line
+        lines = _journal_length(path)
+        with open(journal_path(path), 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        _note_journal_length(path, lines + 1)
+
+        if lines + 1 >= WALLET_JOURNAL_COMPACT_EVERY:
+            _compact_locked(path)
+        return before, store_signature(path)
+
+
+def append_adds(new_wallets: Dict[str, Dict[str, str]], path: str = WALLETS_FILE) -> Dict[str, str]:
+    """
+    Journal many new wallets with one locked append and fsync.
+    Each wallet is checked for a duplicate key or address against the current
+    store (and the wallets before it in `new_wallets`) while the lock is held;
+    conflicting ones are skipped.
+
+    Returns:
+        Dict[str, str]: Reason per skipped wallet key (empty if all were added)
+    """
+    conflicts: Dict[str, str] = {}
+    with wallet_file_lock(path):
+        if not os.path.exists(path):
+            _write_snapshot(path, {})
+        wallets = _read_locked(path)
+        lines = []
+        for key, value in new_wallets.items():
+            error = _find_conflict(wallets, key, value)
+            if error:
+                conflicts[key] = error
+                continue
+            wallets[key] = value
+            lines.append(json.dumps({"op": "add", "key": key, "value": value}) + "\n")
+        if not lines:
+            return conflicts
+        length = _journal_length(path) + len(lines)
+        if not _journal_ends_cleanly(path):
+            lines.insert(0, "\n")
+        with open(journal_path(path), 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        _note_journal_length(path, length)
+
+        if length >= WALLET_JOURNAL_COMPACT_EVERY:
+            _compact_locked(path)
+    return conflicts
+
+
+def write_wallets(wallet_data: Dict[str, Dict[str, str]], path: str = WALLETS_FILE) -> Optional[tuple]:
+    """
+    Replace the whole store with `wallet_data` (atomic snapshot, journal cleared).
+
+    Returns:
+        tuple | None: Store signature right after the write, taken under the lock
+    """
+    with wallet_file_lock(path):
+        _write_snapshot(path, wallet_data)
+        _truncate_journal(path)
+        return store_signature(path)
+
+
+def compact(path: str = WALLETS_FILE):
+    """Fold the journal into a fresh snapshot."""
+    with wallet_file_lock(path):
+        _compact_locked(path)
+
+
+def _read_locked(path: str) -> Dict[str, Dict[str, str]]:
+    """Snapshot plus journal, for callers already holding the lock."""
+    with open(path, 'r') as f:
+        wallets = json.load(f)
+    _replay_journal(path, wallets)
+    return wallets
+
+
+def _find_conflict(wallets: Dict[str, Dict[str, str]], key: str, value: Dict[str, str]) -> Optional[str]:
+    if key in wallets:
+        return f"Wallet '{key}' already exists"
+    for existing_key, info in wallets.items():
+        if info.get('address') == value.get('address'):
+            return f"Address already used by '{existing_key}'"
+    return None
+
+
+def _compact_locked(path: str):
+    """Compact while already holding the exclusive lock."""
+    with open(path, 'r') as f:
+        wallets = json.load(f)
+    applied = _replay_journal(path, wallets)
+    _write_snapshot(path, wallets)
+    _truncate_journal(path)
+    print(f"🗜️ Compacted wallet journal ({applied} change(s)) into {path}")
+
+
+def _write_snapshot(path: str, wallet_data: Dict[str, Dict[str, str]]):
+    """Write to a temp file, fsync, then atomically rename over the snapshot."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(wallet_data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _truncate_journal(path: str):
+    # Replaying is idempotent, so a crash between snapshot and truncate is harmless
+    with open(journal_path(path), 'w'):
+        pass
+    _note_journal_length(path, 0)
+
+
+def _journal_ends_cleanly(path: str) -> bool:
+    try:
+        with open(journal_path(path), 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+    except FileNotFoundError:
+        return True
+
+
+# Journal line counts by path, valid while the journal's (inode, size, mtime) is unchanged
+_journal_lengths: Dict[str, Tuple[tuple, int]] = {}
+
+
+def _journal_stat(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(journal_path(path))
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _journal_length(path: str) -> int:
+    """Lines in the journal; only recounted when another process changed it. Caller holds the lock."""
+    stat = _journal_stat(path)
+    if stat is None:
+        return 0
+    cached = _journal_lengths.get(path)
+    if cached is not None and cached[0] == stat:
+        return cached[1]
+    with open(journal_path(path), 'r', encoding='utf-8') as f:
+        length = sum(1 for _ in f)
+    _journal_lengths[path] = (stat, length)
+    return length
+
+
+def _note_journal_length(path: str, length: int):
+    """Record the line count after our own write, so the next append does not recount."""
+    stat = _journal_stat(path)
+    if stat is not None:
+        _journal_lengths[path] = (stat, length)
+
+
+def _replay_journal(path: str, wallets: Dict[str, Dict[str, str]]) -> int:
+    """Apply journal entries in order; a torn trailing line from a crash is ignored."""
+    applied = 0
+    try:
+        with open(journal_path(path), 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ Skipping unreadable wallet journal line {line_no}")
+                    continue
+                if entry.get("op") == "add":
+                    wallets[entry["key"]] = entry["value"]
+                elif entry.get("op") == "remove":
+                    wallets.pop(entry["key"], None)
+                applied += 1
+    except FileNotFoundError:
+        pass
+    return applied
@@ -3,18 +3,34 @@
 """
 Slack message listener for wallet commands.
 Mention-only mode - bot only responds when directly mentioned.
+
+Two interchangeable front ends:
+- WalletCommandBot (default): thread-based socket-mode client plus a bounded command pool
+- AsyncWalletCommandBot: asyncio socket-mode and web clients (needs aiohttp),
+  selected with LISTENER_MODE=async or `python slack_listener.py --async`
 """
+import asyncio
 import os
+import sys
 import time
 import re
+import requests
 from slack_sdk import WebClient
 from slack_sdk.socket_mode import SocketModeClient
 from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.socket_mode.response import SocketModeResponse
 from dotenv import load_dotenv
 
-from bot.slack_commands import handle_slack_command
-from bot.config import ALLOWED_SLACK_USERS
+from bot.slack_commands import (handle_slack_command, handle_chart_command, handle_check_command_progressive,
+                                handle_check_command_progressive_async)
+from bot.chart_renderer import shutdown_chart_renderer
+from bot.check_progress import publish_final, publish_final_async
+from bot.command_dispatcher import CommandDispatcher
+from bot.event_dedup import get_event_deduplicator, event_keys
+from bot.balance_poller import start_balance_poller, stop_balance_poller
+from bot.balance_log import close_balance_logs
+from bot.config import (ALLOWED_SLACK_USERS, POLL_ENABLED, POLL_INTERVAL, HISTORY_COLUMNAR_ENABLED,
+                        LISTENER_MODE, COMMAND_QUEUE_LIMIT, COMMAND_CONCURRENCY)
 
 # Load environment variables
 load_dotenv()
@@ -25,26 +41,56 @@ SLACK_APP_TOKEN = os.environ.get('SLACK_APP_TOKEN')
 SLACK_CHANNEL_ID = os.environ.get('SLACK_CHANNEL_ID')
 
 # Valid commands
-VALID_COMMANDS = ['add', 'remove', 'check', 'list', 'help']
+VALID_COMMANDS = ['add', 'import', 'remove', 'check', 'chart', 'list', 'help']
 
+# Response headers per command
+RESPONSE_HEADERS = {
+    "!list": "Wallet List",
+    "!help": "Help - Available Commands",
+    "!check": "Wallet Balance Check",
+    "!chart": "Balance Chart",
+    "!add": "Add Wallet Result",
+    "!import": "Import Wallets Result",
+    "!remove": "Remove Wallet Result",
+}
 
-class WalletCommandBot:
-    def __init__(self):
-        """Initialize the bot with Slack clients and authentication."""
-        self.web_client = WebClient(token=SLACK_BOT_TOKEN)
-        self.socket_client = SocketModeClient(
-            app_token=SLACK_APP_TOKEN,
-            web_client=self.web_client
-        )
-        
-        # Get bot user ID
-        try:
-            auth_response = self.web_client.auth_test()
-            self.bot_user_id = auth_response["user_id"]
-            print(f"✅ Bot authenticated as {auth_response['user']} ({self.bot_user_id})")
-        except Exception as e:
-            print(f"❌ Failed to authenticate bot: {e}")
-            self.bot_user_id = None
+INVALID_MENTION_TEXT = ("🤖 Please use a valid command after mentioning me.\n\nExample: `@bot !help`\n\n"
+                        "Available: `!help` `!check` `!chart` `!list` `!add` `!import` `!remove`")
+UNAUTHORIZED_TEXT = "⛔ You do not have permission to use this command. Please contact an administrator."
+CHECK_PLACEHOLDER_TEXT = "⏳ Checking balances..."
+
+
+def busy_text(command: str) -> str:
+    return f"⏳ I'm busy with other requests right now. Please try `{command}` again in a moment."
+
+
+def start_background_services():
+    """Start the balance poller and history compactor (both listener modes)."""
+    # Load the de-dup file now rather than on the first event
+    get_event_deduplicator()
+    
+    if POLL_ENABLED:
+        start_balance_poller(POLL_INTERVAL)
+    
+    if HISTORY_COLUMNAR_ENABLED:
+        from bot.history_store import start_history_compactor
+        start_history_compactor()
+
+
+def stop_background_services():
+    """Stop background threads and worker processes and commit buffered history."""
+    stop_balance_poller()
+    if HISTORY_COLUMNAR_ENABLED:
+        from bot.history_store import stop_history_compactor
+        stop_history_compactor()
+    shutdown_chart_renderer()
+    close_balance_logs()
+
+
+class MentionCommandBot:
+    """Mention parsing and reply formatting shared by the threaded and asyncio bots."""
+    
+    bot_user_id = None
     
     def parse_mention_command(self, message: str, user_id: str) -> tuple:
         """
@@ -73,8 +119,8 @@ class WalletCommandBot:
         if not clean_message.startswith('!'):
             return False, None, None
         
-        # Parse command
-        parts = clean_message[1:].split(' ', 1)
+        # Parse command (split on any whitespace so `!import` can be followed by a newline)
+        parts = clean_message[1:].split(None, 1)
         cmd = parts[0].lower()
         
         if cmd in VALID_COMMANDS:
@@ -84,6 +130,60 @@ class WalletCommandBot:
         
         return False, None, None
     
+    def is_redelivery(self, req: SocketModeRequest) -> bool:
+        """
+        True if this event was already handled (Slack retry after a slow ack, or a replay after a reconnect).
+        Checked right after the ack, so a redelivered event makes no Slack or balance API calls.
+        """
+        if req.type != "events_api":
+            return False
+        if not get_event_deduplicator().is_duplicate(event_keys(req.payload)):
+            return False
+        print(f"♻️ Ignoring redelivered event {req.payload.get('event_id')} (retry {req.retry_attempt or 0})")
+        return True
+    
+    def screen_mention(self, event: dict) -> tuple:
+        """
+        Decide what to do with an incoming event before any real work happens.
+        
+        Args:
+            event: Event payload from the socket-mode envelope
+        
+        Returns:
+            tuple: (command, text, reply) - a command to run, or a reply to post
+                instead; all None when the event is ignored
+        """
+        # Only process app_mention events
+        if event.get("type") != "app_mention":
+            return None, None, None
+        
+        # Get message details
+        channel_id = event.get("channel")
+        user_id = event.get("user")
+        message_text = event.get("text", "")
+        
+        # Skip bot messages
+        if user_id == self.bot_user_id:
+            return None, None, None
+        
+        # Only process messages from our target channel
+        if channel_id != SLACK_CHANNEL_ID:
+            return None, None, None
+        
+        # Parse command from mention
+        is_command, command, text = self.parse_mention_command(message_text, user_id)
+        
+        if not is_command:
+            # Invalid mention - show help
+            return None, None, INVALID_MENTION_TEXT
+        
+        # Check permissions
+        if user_id not in ALLOWED_SLACK_USERS:
+            print(f"⛔ Unauthorized command attempt by user {user_id} for command '{command}'")
+            return None, None, UNAUTHORIZED_TEXT
+        
+        return command, text, None
+    
     def format_slack_text(self, text: str) -> str:
         """Convert markdown-style formatting to Slack formatting."""
         lines = text.split('\n')
@@ -110,6 +210,144 @@ class WalletCommandBot:
         
         return '\n'.join(formatted_lines)
     
+    def format_response(self, command: str, response_text: str) -> str:
+        """Format a command response with its header."""
+        header = RESPONSE_HEADERS.get(command, "Response")
+        return f"🤖 *{header}*\n\n{self.format_slack_text(response_text)}"
+    
+    def download_attached_csv(self, event: dict) -> str:
+        """Return the text of CSV/plain-text files attached to a mention (requires files:read)."""
+        contents = []
+        for file_info in event.get("files", []):
+            if file_info.get("filetype") not in ("csv", "text") or not file_info.get("url_private"):
+                continue
+            try:
+                response = requests.get(
+                    file_info["url_private"],
+                    headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
+                    timeout=15
+                )
+                response.raise_for_status()
+                contents.append(response.content.decode("utf-8-sig"))
+            except Exception as e:
+                print(f"❌ Failed to download attached file {file_info.get('name')}: {e}")
+        return "\n".join(contents)
+    
+    def print_banner(self, mode: str):
+        print(f"🚀 Starting USDT Wallet Bot (Mention-Only Mode, {mode})...")
+        print(f"📡 Listening for mentions in channel: {SLACK_CHANNEL_ID}")
+        print("💬 Usage (MUST mention bot):")
+        print("   @bot !help     - Show commands")
+        print("   @bot !check    - Check balances")
+        print("   @bot !chart    - Balance trend chart")
+        print("   @bot !list     - List wallets")
+        print("   @bot !add \"company\" \"wallet\" \"address\"")
+        print("   @bot !import + company,wallet,address rows or a CSV file")
+        print("   @bot !remove \"wallet_name\"")
+        print()
+        print(f"🔐 Authorized users: {', '.join(ALLOWED_SLACK_USERS)}")
+        print("🔒 Bot will be SILENT for non-mention messages")
+        print()
+        print("🔄 Bot running... Press Ctrl+C to stop")
+
+
+class WalletCommandBot(MentionCommandBot):
+    def __init__(self):
+        """Initialize the bot with Slack clients and authentication."""
+        self.web_client = WebClient(token=SLACK_BOT_TOKEN)
+        self.socket_client = SocketModeClient(
+            app_token=SLACK_APP_TOKEN,
+            web_client=self.web_client
+        )
+        # Commands run here, off the socket-mode callback
+        self.dispatcher = CommandDispatcher()
+        
+        # Get bot user ID
+        try:
+            auth_response = self.web_client.auth_test()
+            self.bot_user_id = auth_response["user_id"]
+            print(f"✅ Bot authenticated as {auth_response['user']} ({self.bot_user_id})")
+        except Exception as e:
+            print(f"❌ Failed to authenticate bot: {e}")
+            self.bot_user_id = None
+    
+    def send_chart(self, channel_id: str, text: str):
+        """Render a chart in the process pool and upload it (requires files:write)."""
+        message, image_path = handle_chart_command(text)
+        if image_path is None:
+            self.web_client.chat_postMessage(
+                channel=channel_id,
+                text=self.format_response("!chart", message),
+                mrkdwn=True
+            )
+            return
+        
+        self.web_client.files_upload_v2(
+            channel=channel_id,
+            file=image_path,
+            filename="wallet_trend.png",
+            title="Wallet Balance Trend",
+            initial_comment=self.format_response("!chart", message)
+        )
+    
+    def send_progressive_check(self, channel_id: str, text: str):
+        """Post a placeholder right away and edit it in place as balances arrive (throttled)."""
+        placeholder = self.web_client.chat_postMessage(
+            channel=channel_id,
+            text=self.format_response("!check", CHECK_PLACEHOLDER_TEXT),
+            mrkdwn=True
+        )
+        ts = placeholder["ts"]
+        
+        def publish(partial_text: str):
+            self.web_client.chat_update(channel=channel_id, ts=ts, text=self.format_response("!check", partial_text))
+        
+        response_text = handle_check_command_progressive(text, publish)
+        final_text = self.format_response("!check", response_text)
+        publish_final(
+            lambda: self.web_client.chat_update(channel=channel_id, ts=ts, text=final_text),
+            lambda: self.web_client.chat_postMessage(channel=channel_id, text=final_text, mrkdwn=True),
+        )
+    
+    def process_command(self, channel_id: str, user_id: str, command: str, text: str, event: dict):
+        """Run one validated command and post its reply (executed by the dispatcher's workers)."""
+        print(f"📨 Processing mention command: {command} '{text}' from user {user_id}")
+        
+        # Process the command
+        try:
+            if command == "!import" and event.get("files"):
+                attached = self.download_attached_csv(event)
+                text = f"{text}\n{attached}".strip()
+            
+            if command == "!chart":
+                self.send_chart(channel_id, text)
+                print(f"✅ Response sent for {command}")
+                return
+            
+            if command == "!check":
+                self.send_progressive_check(channel_id, text)
+                print(f"✅ Response sent for {command}")
+                return
+            
+            response_text = handle_slack_command(command, text, user_id, channel_id)
+            
+            # Send response
+            self.web_client.chat_postMessage(
+                channel=channel_id,
+                text=self.format_response(command, response_text),
+                mrkdwn=True
+            )
+            
+            print(f"✅ Response sent for {command}")
+        
+        except Exception as e:
+            print(f"❌ Error processing command {command}: {e}")
+            self.web_client.chat_postMessage(
+                channel=channel_id,
+                text=f"❌ Error processing `{command}` command. Please try again.",
+                mrkdwn=True
+            )
+    
     def handle_app_mentions(self, client: SocketModeClient, req: SocketModeRequest):
         """Handle app mention events only - mention-only mode."""
         try:
@@ -117,85 +355,25 @@ class WalletCommandBot:
             response = SocketModeResponse(envelope_id=req.envelope_id)
             client.send_socket_mode_response(response)
             
-            # Extract event data
-            event = req.payload.get("event", {})
-            event_type = event.get("type")
-            
-            # Only process app_mention events
-            if event_type != "app_mention":
+            if self.is_redelivery(req):
                 return
             
-            # Get message details
+            event = req.payload.get("event", {})
+            command, text, reply = self.screen_mention(event)
             channel_id = event.get("channel")
             user_id = event.get("user")
-            message_text = event.get("text", "")
             
-            # Skip bot messages
-            if user_id == self.bot_user_id:
+            if reply:
+                self.web_client.chat_postMessage(channel=channel_id, text=reply, mrkdwn=True)
                 return
-            
-            # Only process messages from our target channel
-            if channel_id != SLACK_CHANNEL_ID:
+            if command is None:
                 return
             
-            # Parse command from mention
-            is_command, command, text = self.parse_mention_command(message_text, user_id)
+            print(f"📨 Queueing mention command: {command} '{text}' from user {user_id}")
             
-            if not is_command:
-                # Invalid mention - show help
-                self.web_client.chat_postMessage(
-                    channel=channel_id,
-                    text="🤖 Please use a valid command after mentioning me.\n\nExample: `@bot !help`\n\nAvailable: `!help` `!check` `!list` `!add` `!remove`",
-                    mrkdwn=True
-                )
-                return
-            
-            # Check permissions
-            if user_id not in ALLOWED_SLACK_USERS:
-                print(f"⛔ Unauthorized command attempt by user {user_id} for command '{command}'")
-                self.web_client.chat_postMessage(
-                    channel=channel_id,
-                    text="⛔ You do not have permission to use this command. Please contact an administrator.",
-                    mrkdwn=True
-                )
-                return
-            
-            print(f"📨 Processing mention command: {command} '{text}' from user {user_id}")
-            
-            # Process the command
-            try:
-                response_text = handle_slack_command(command, text, user_id, channel_id)
-                
-                # Format response with headers
-                if command == "!list":
-                    formatted_response = f"🤖 *Wallet List*\n\n{self.format_slack_text(response_text)}"
-                elif command == "!help":
-                    formatted_response = f"🤖 *Help - Available Commands*\n\n{self.format_slack_text(response_text)}"
-                elif command == "!check":
-                    formatted_response = f"🤖 *Wallet Balance Check*\n\n{self.format_slack_text(response_text)}"
-                elif command == "!add":
-                    formatted_response = f"🤖 *Add Wallet Result*\n\n{self.format_slack_text(response_text)}"
-                elif command == "!remove":
-                    formatted_response = f"🤖 *Remove Wallet Result*\n\n{self.format_slack_text(response_text)}"
-                else:
-                    formatted_response = f"🤖 *Response*\n\n{self.format_slack_text(response_text)}"
-                
-                # Send response
-                self.web_client.chat_postMessage(
-                    channel=channel_id,
-                    text=formatted_response,
-                    mrkdwn=True
-                )
-                
-                print(f"✅ Response sent for {command}")
-                
-            except Exception as e:
-                print(f"❌ Error processing command {command}: {e}")
-                self.web_client.chat_postMessage(
-                    channel=channel_id,
-                    text=f"❌ Error processing `{command}` command. Please try again.",
-                    mrkdwn=True
-                )
+            if not self.dispatcher.submit(command, self.process_command, channel_id, user_id, command, text, event):
+                print(f"⏳ Command queue full, rejected {command} from user {user_id}")
+                self.web_client.chat_postMessage(channel=channel_id, text=busy_text(command), mrkdwn=True)
         
         except Exception as e:
             print(f"❌ Error in mention handler: {e}")
@@ -211,34 +389,230 @@ class WalletCommandBot:
         # Register ONLY app mention handler
         self.socket_client.socket_mode_request_listeners.append(self.handle_app_mentions)
         
-        print("🚀 Starting USDT Wallet Bot (Mention-Only Mode)...")
-        print(f"📡 Listening for mentions in channel: {SLACK_CHANNEL_ID}")
-        print("💬 Usage (MUST mention bot):")
-        print("   @bot !help     - Show commands")
-        print("   @bot !check    - Check balances")
-        print("   @bot !list     - List wallets")
-        print("   @bot !add \"company\" \"wallet\" \"address\"")
-        print("   @bot !remove \"wallet_name\"")
-        print()
-        print(f"🔐 Authorized users: {', '.join(ALLOWED_SLACK_USERS)}")
-        print("🔒 Bot will be SILENT for non-mention messages")
-        print()
-        print("🔄 Bot running... Press Ctrl+C to stop")
+        self.print_banner("threaded")
         
         try:
             self.socket_client.connect()
             
+            start_background_services()
+            
             while True:
                 time.sleep(1)
-                
+        
         except KeyboardInterrupt:
             print("\n🛑 Bot stopped by user")
         except Exception as e:
             print(f"❌ Bot error: {e}")
         finally:
+            self.dispatcher.shutdown()
+            stop_background_services()
             self.socket_client.disconnect()
 
 
+class AsyncWalletCommandBot(MentionCommandBot):
+    """
+    Asyncio variant of WalletCommandBot on slack_sdk's aiohttp socket-mode and
+    async web clients. Each command is a task on one event loop: !check awaits
+    balances through fetch_balances_async (streaming progress like the threaded bot), Slack calls are awaited, and the
+    remaining blocking work (wallet file I/O, chart rendering) runs in threads.
+    Heavy commands are capped by COMMAND_CONCURRENCY and at most
+    COMMAND_QUEUE_LIMIT commands are in progress; cheap ones never wait behind them.
+    """
+    
+    def __init__(self):
+        # Imported here so the threaded mode does not need aiohttp
+        from slack_sdk.web.async_client import AsyncWebClient
+        from slack_sdk.socket_mode.aiohttp import SocketModeClient as AsyncSocketModeClient
+        
+        self.web_client = AsyncWebClient(token=SLACK_BOT_TOKEN)
+        self.socket_client = AsyncSocketModeClient(
+            app_token=SLACK_APP_TOKEN,
+            web_client=self.web_client
+        )
+        self.bot_user_id = None
+        self._tasks = set()
+        self._limits = {}
+    
+    async def authenticate(self) -> bool:
+        """Look up the bot user ID; False if the token is rejected."""
+        try:
+            auth_response = await self.web_client.auth_test()
+            self.bot_user_id = auth_response["user_id"]
+            print(f"✅ Bot authenticated as {auth_response['user']} ({self.bot_user_id})")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to authenticate bot: {e}")
+            return False
+    
+    def _limit(self, command: str):
+        """Per-command semaphore (created on the running loop), or None if unlimited."""
+        limit = COMMAND_CONCURRENCY.get(command)
+        if limit is None:
+            return None
+        if command not in self._limits:
+            self._limits[command] = asyncio.Semaphore(limit)
+        return self._limits[command]
+    
+    async def send_chart(self, channel_id: str, text: str):
+        """Render a chart in the process pool (waited for in a thread) and upload it."""
+        message, image_path = await asyncio.to_thread(handle_chart_command, text)
+        if image_path is None:
+            await self.web_client.chat_postMessage(
+                channel=channel_id,
+                text=self.format_response("!chart", message),
+                mrkdwn=True
+            )
+            return
+        
+        await self.web_client.files_upload_v2(
+            channel=channel_id,
+            file=image_path,
+            filename="wallet_trend.png",
+            title="Wallet Balance Trend",
+            initial_comment=self.format_response("!chart", message)
+        )
+    
+    async def send_progressive_check(self, channel_id: str, text: str):
+        """Post a placeholder right away and edit it in place as balances arrive (throttled)."""
+        placeholder = await self.web_client.chat_postMessage(
+            channel=channel_id,
+            text=self.format_response("!check", CHECK_PLACEHOLDER_TEXT),
+            mrkdwn=True
+        )
+        ts = placeholder["ts"]
+        
+        async def publish(partial_text: str):
+            await self.web_client.chat_update(channel=channel_id, ts=ts,
+                                              text=self.format_response("!check", partial_text))
+        
+        response_text = await handle_check_command_progressive_async(text, publish)
+        final_text = self.format_response("!check", response_text)
+        await publish_final_async(
+            lambda: self.web_client.chat_update(channel=channel_id, ts=ts, text=final_text),
+            lambda: self.web_client.chat_postMessage(channel=channel_id, text=final_text, mrkdwn=True),
+        )
+    
+    async def process_command(self, channel_id: str, user_id: str, command: str, text: str, event: dict):
+        """Run one validated command and post its reply."""
+        limit = self._limit(command)
+        if limit is not None:
+            await limit.acquire()
+        print(f"📨 Processing mention command: {command} '{text}' from user {user_id}")
+        
+        try:
+            if command == "!import" and event.get("files"):
+                attached = await asyncio.to_thread(self.download_attached_csv, event)
+                text = f"{text}\n{attached}".strip()
+            
+            if command == "!chart":
+                await self.send_chart(channel_id, text)
+                print(f"✅ Response sent for {command}")
+                return
+            
+            if command == "!check":
+                await self.send_progressive_check(channel_id, text)
+                print(f"✅ Response sent for {command}")
+                return
+            
+            # Wallet file I/O and registry updates stay synchronous
+            response_text = await asyncio.to_thread(handle_slack_command, command, text, user_id, channel_id)
+            
+            await self.web_client.chat_postMessage(
+                channel=channel_id,
+                text=self.format_response(command, response_text),
+                mrkdwn=True
+            )
+            
+            print(f"✅ Response sent for {command}")
+        
+        except Exception as e:
+            print(f"❌ Error processing command {command}: {e}")
+            await self.web_client.chat_postMessage(
+                channel=channel_id,
+                text=f"❌ Error processing `{command}` command. Please try again.",
+                mrkdwn=True
+            )
+        finally:
+            if limit is not None:
+                limit.release()
+    
+    async def handle_app_mentions(self, client, req: SocketModeRequest):
+        """Handle app mention events only - mention-only mode."""
+        try:
+            # Acknowledge the request
+            await client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
+            
+            # May wait on the EVENT_DEDUP_FILE lock and fsync; keep that off the event loop
+            if await asyncio.to_thread(self.is_redelivery, req):
+                return
+            
+            event = req.payload.get("event", {})
+            command, text, reply = self.screen_mention(event)
+            channel_id = event.get("channel")
+            user_id = event.get("user")
+            
+            if reply:
+                await self.web_client.chat_postMessage(channel=channel_id, text=reply, mrkdwn=True)
+                return
+            if command is None:
+                return
+            
+            if len(self._tasks) >= COMMAND_QUEUE_LIMIT:
+                print(f"⏳ Too many commands in progress, rejected {command} from user {user_id}")
+                await self.web_client.chat_postMessage(channel=channel_id, text=busy_text(command), mrkdwn=True)
+                return
+            
+            task = asyncio.create_task(self.process_command(channel_id, user_id, command, text, event))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        
+        except Exception as e:
+            print(f"❌ Error in mention handler: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    async def start(self):
+        """Start the asyncio bot listener in mention-only mode."""
+        if not await self.authenticate():
+            print("❌ Cannot start bot - authentication failed")
+            await self.socket_client.close()
+            return
+        
+        # Register ONLY app mention handler
+        self.socket_client.socket_mode_request_listeners.append(self.handle_app_mentions)
+        
+        self.print_banner("asyncio")
+        
+        try:
+            await self.socket_client.connect()
+            
+            await asyncio.to_thread(start_background_services)
+            
+            await asyncio.Event().wait()
+        
+        except asyncio.CancelledError:
+            print("\n🛑 Bot stopped by user")
+        except Exception as e:
+            print(f"❌ Bot error: {e}")
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            # Joining the poller and compactor threads blocks briefly; keep it off the loop
+            await asyncio.to_thread(stop_background_services)
+            await self.socket_client.disconnect()
+            await self.socket_client.close()
+
+
+async def run_async_bot():
+    """Create the asyncio bot on the running loop (the aiohttp client needs one) and start it."""
+    try:
+        bot = AsyncWalletCommandBot()
+    except ImportError as e:
+        print(f"❌ The asyncio listener needs aiohttp (pip install aiohttp): {e}")
+        return
+    await bot.start()
+
+
 def main():
     """Main entry point."""
     # Check required environment variables
@@ -255,9 +629,16 @@ def main():
         return
     
     # Create and start bot
+    if LISTENER_MODE == "async" or "--async" in sys.argv[1:]:
+        try:
+            asyncio.run(run_async_bot())
+        except KeyboardInterrupt:
+            pass
+        return
+    
     bot = WalletCommandBot()
     bot.start()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()